@@ -1,8 +1,92 @@
+import sys
+
+
+class NodeKind:
+    """What an ASTNode is. ID, INT and STR nodes keep their literal in value.
+
+    Plain ints rather than an Enum, so that the standardizer's and the
+    control-structure builder's match statements compare integers.
+    """
+    ID = 0
+    INT = 1
+    STR = 2
+    TRUE = 3
+    FALSE = 4
+    NIL = 5
+    DUMMY = 6
+    YSTAR = 7
+    EMPTY = 8
+    LET = 9
+    LAMBDA = 10
+    WHERE = 11
+    TAU = 12
+    AUG = 13
+    COND = 14
+    OR = 15
+    AMP = 16
+    NOT = 17
+    GR = 18
+    GE = 19
+    LS = 20
+    LE = 21
+    EQ = 22
+    NE = 23
+    PLUS = 24
+    MINUS = 25
+    NEG = 26
+    MULTIPLY = 27
+    DIVIDE = 28
+    POWER = 29
+    AT = 30
+    GAMMA = 31
+    WITHIN = 32
+    AND = 33
+    REC = 34
+    EQUAL = 35
+    FCN_FORM = 36
+    COMMA = 37
+
+
+# Printed name of each kind; ID, INT and STR nodes print as <ID:value> etc.
+NAMES = {
+    NodeKind.ID: "ID", NodeKind.INT: "INT", NodeKind.STR: "STR",
+    NodeKind.TRUE: "<true>", NodeKind.FALSE: "<false>", NodeKind.NIL: "<nil>",
+    NodeKind.DUMMY: "<dummy>", NodeKind.YSTAR: "<Y*>", NodeKind.EMPTY: "()",
+    NodeKind.LET: "let", NodeKind.LAMBDA: "lambda", NodeKind.WHERE: "where",
+    NodeKind.TAU: "tau", NodeKind.AUG: "aug", NodeKind.COND: "->",
+    NodeKind.OR: "or", NodeKind.AMP: "&", NodeKind.NOT: "not",
+    NodeKind.GR: "gr", NodeKind.GE: "ge", NodeKind.LS: "ls", NodeKind.LE: "le",
+    NodeKind.EQ: "eq", NodeKind.NE: "ne",
+    NodeKind.PLUS: "+", NodeKind.MINUS: "-", NodeKind.NEG: "neg",
+    NodeKind.MULTIPLY: "*", NodeKind.DIVIDE: "/", NodeKind.POWER: "**",
+    NodeKind.AT: "@", NodeKind.GAMMA: "gamma", NodeKind.WITHIN: "within",
+    NodeKind.AND: "and", NodeKind.REC: "rec", NodeKind.EQUAL: "=",
+    NodeKind.FCN_FORM: "fcn_form", NodeKind.COMMA: ",",
+}
+
+# Kind of each printed name, for operators read from tokens
+KINDS = {name: kind for kind, name in NAMES.items()}
+
+LITERAL_KINDS = (NodeKind.ID, NodeKind.INT, NodeKind.STR)
+
+
 class ASTNode:
-    def __init__(self, type_name, value=None, children=None):
-        self.type = type_name
+    __slots__ = ("kind", "value", "children", "line")
+
+    def __init__(self, kind, value=None, children=None, line=None):
+        self.kind = kind
         self.value = value
         self.children = children if children is not None else []
+        # Source line, kept on the nodes that become lambdas for the profiler
+        self.line = line
+
+    @property
+    def type(self):
+        """Printed form of the node, such as 'gamma' or '<ID:x>'."""
+        kind = self.kind
+        if kind in LITERAL_KINDS:
+            return f"<{NAMES[kind]}:{self.value}>"
+        return NAMES[kind]
     
     def add_child(self, child):
         self.children.append(child)
@@ -11,16 +95,38 @@ class ASTNode:
         return self.to_string()
     
     def to_string(self, level=0):
-        indent = "  " * level
-        result = f"{indent}{self.type}"
-        if self.value is not None:
-            result += f": {self.value}"
-        result += "\n"
-        
-        for child in self.children:
-            result += child.to_string(level + 1)
-        
-        return result
+        return "".join(self.lines(level, "  ", True))
+
+    def lines(self, level=0, indent=".", values=False):
+        """Yield one line per node in pre-order, using an explicit stack so
+        that deep trees cannot exceed the recursion limit."""
+        pending = [(self, level)]
+        pop = pending.pop
+        push = pending.append
+        while pending:
+            node, depth = pop()
+            if values and node.value is not None:
+                yield f"{indent * depth}{node.type}: {node.value}\n"
+            else:
+                yield f"{indent * depth}{node.type}\n"
+            children = node.children
+            for i in range(len(children) - 1, -1, -1):
+                push((children[i], depth + 1))
+
+    def write_tree(self, *sinks, indent=0):
+        """Write the dot-indented tree to every sink in one pass over the nodes,
+        in blocks of lines rather than one write per node."""
+        block = []
+        for line in self.lines(indent):
+            block.append(line)
+            if len(block) == 4096:
+                text = "".join(block)
+                for sink in sinks:
+                    sink.write(text)
+                block.clear()
+        text = "".join(block)
+        for sink in sinks:
+            sink.write(text)
     '''
     def print_tree(self, indent=0):
         """Print the AST in a readable format"""
@@ -37,8 +143,4 @@ class ASTNode:
 
     def print_tree(self, indent=0):
       """Print the AST in a readable format (only type, no value)"""
-      prefix = '.' * indent
-      print(f"{prefix}{self.type}")
-    
-      for child in self.children:
-        child.print_tree(indent + 1)
+      self.write_tree(sys.stdout, indent=indent)
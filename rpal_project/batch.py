@@ -0,0 +1,98 @@
+"""Evaluate every .rpal program in a directory on a pool of worker processes.
+
+Used by myrpal.py --batch DIR. Each worker imports the interpreter once and
+then evaluates many programs, so a large suite does not pay interpreter
+start-up for every file.
+"""
+import glob
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from lexer.lexical_analyzer import LexicalError
+from cse.csemachine import RPALRuntimeError
+from myrpal import evaluate
+
+# Where each program's output is written, as <name>.out
+OUTPUT_DIR = os.path.join("outputs", "batch")
+
+
+# Derived from BaseException so that no except Exception in the interpreter
+# can swallow it
+class ProgramTimeout(BaseException):
+    pass
+
+
+def on_timeout(signum, frame):
+    raise ProgramTimeout()
+
+
+def run_program(file_path, mode, use_cache, use_mmap, timeout, optimize):
+    """Evaluate one program in a worker.
+
+    Returns what myrpal.py would print for it, its exit code, a status (ok,
+    error or timeout) and the seconds it took.
+    """
+    start = time.perf_counter()
+    signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        file = open(file_path, 'rb' if use_mmap else 'r')
+        result = evaluate(file, file_path, mode, use_cache, use_mmap, optimize)
+        output, exit_code = f"{result}\n", 0
+    except ProgramTimeout:
+        output, exit_code = f"Timed out after {timeout:g} s\n", None
+    except LexicalError as e:
+        output, exit_code = f"Lexical Error: {e}\n", 1
+    except SyntaxError as e:
+        output, exit_code = f"Syntax Error: {e}\n", 1
+    except RPALRuntimeError as e:
+        output, exit_code = f"{e}\n", e.exit_code
+    except Exception as e:
+        output, exit_code = f"{type(e).__name__}: {e}\n", 1
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    if exit_code is None:
+        status, exit_code = "timeout", 1
+    else:
+        status = "ok" if exit_code == 0 else "error"
+    return output, exit_code, status, time.perf_counter() - start
+
+
+def run_batch(directory, mode, use_cache, use_mmap, jobs=None, timeout=10.0, optimize=True):
+    """Evaluate directory/*.rpal, write each output to OUTPUT_DIR and print a
+    summary. Returns the exit status: 0 if every program succeeded."""
+    paths = sorted(glob.glob(os.path.join(directory, "*.rpal")))
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_program, path, mode, use_cache, use_mmap, timeout, optimize): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except BrokenProcessPool:
+                # The worker died, e.g. killed for running out of memory
+                results[path] = ("Worker process died\n", 1, "crashed", 0.0)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    print(f"{'status':8s} {'exit':>4s} {'seconds':>8s}  file")
+    for path in paths:
+        output, exit_code, status, seconds = results[path]
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(os.path.join(OUTPUT_DIR, name + ".out"), "w") as file:
+            file.write(output)
+        counts[status] = counts.get(status, 0) + 1
+        print(f"{status:8s} {exit_code:4d} {seconds:8.3f}  {path}")
+
+    busy = sum(result[3] for result in results.values())
+    tally = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"{len(paths)} programs: {tally or 'none'}; {elapsed:.2f} s wall, {busy:.2f} s in programs")
+    print(f"Outputs written to {OUTPUT_DIR}/")
+    return 0 if counts.get("ok", 0) == len(paths) else 1
@@ -0,0 +1,81 @@
+"""Instructions-per-second benchmark for the CSE machine.
+
+Usage: python benchmarks/bench_cse.py [--against=REV] [repeat]
+
+Each program runs on CSEMachine in a fresh process, best of repeat runs
+(default 3). With --against=REV it also runs on the CSE machine of that
+revision; 28fc54a^ is the if/elif chain ApplyRules used before the opcode
+handler table. Revisions that do not count instructions show none.
+"""
+import contextlib
+import json
+import sys
+import time
+
+from revisions import PROJECT, interpreter_path, option, worktree, measure_in
+
+sys.path.insert(0, interpreter_path())
+
+from lexer.lexical_analyzer import tokenize
+from parser.parser import RPALParser
+from standardizer.standardizer import standardize
+from cse.csemachine import CSEMachine
+
+# Arithmetic-heavy: a loop whose body is mostly Rule 6 / Rule 7 work
+ARITHMETIC = """
+let rec loop n acc =
+    n eq 0 -> acc
+    | loop (n - 1) ((acc + n * 3 - n / 2 + (n ** 2) / (n + 1)) + (-1))
+in Print (loop 3000 0)
+"""
+
+# Call-heavy: naive doubly recursive Fibonacci, mostly Rules 11, 12, 13 and 5
+CALLS = """
+let rec fib n = n ls 2 -> n | fib (n - 1) + fib (n - 2)
+in Print (fib 18)
+"""
+
+PROGRAMS = [("arithmetic", ARITHMETIC), ("calls", CALLS)]
+
+
+def measure(name, repeat):
+    source = dict(PROGRAMS)[name]
+    best = None
+    steps = None
+    for _ in range(repeat):
+        tree = standardize(RPALParser(tokenize(source)).parse())
+        machine = CSEMachine()
+        start = time.perf_counter()
+        machine.run(tree)
+        elapsed = time.perf_counter() - start
+        steps = getattr(machine, "steps", None)
+        if best is None or elapsed < best:
+            best = elapsed
+    return {"steps": steps, "seconds": best}
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        print(json.dumps(measure(args[1], int(args[2]))))
+        return
+
+    revision = option(args, "--against")
+    numbers = [arg for arg in args if not arg.startswith("--")]
+    repeat = int(numbers[0]) if numbers else 3
+    with (worktree(revision) if revision else contextlib.nullcontext()) as tree:
+        trees = [(revision, tree)] if revision else []
+        trees.append(("current", PROJECT))
+        print(f"{'program':12s} {'machine':14s} {'instructions':>12s} {'best':>9s} {'instr/s':>12s}")
+        for name, _ in PROGRAMS:
+            for machine, path in trees:
+                result = measure_in(path, __file__, name, repeat)
+                steps, elapsed = result["steps"], result["seconds"]
+                if steps is None:
+                    print(f"{name:12s} {machine:14s} {'-':>12s} {elapsed:8.3f}s {'-':>12s}")
+                else:
+                    print(f"{name:12s} {machine:14s} {steps:12d} {elapsed:8.3f}s {steps / elapsed:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
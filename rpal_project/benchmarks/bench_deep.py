@@ -0,0 +1,70 @@
+"""Standardizer and control-structure builder benchmark on deep synthetic trees.
+
+Usage: python benchmarks/bench_deep.py [size ...]
+
+Each size is a number of AST nodes; the defaults are 10^5 and 10^6. Two tree
+shapes are generated directly as ASTNode objects, bypassing the parser:
+
+  aug-chain    ((nil aug 1) aug 2) aug ... -- left-deep, one level per element
+  nested-let   let x0 = 0 in let x1 = x0 in ... -- one lambda per binding
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ast.ast import ASTNode, NodeKind
+from standardizer.standardizer import standardize
+from cse.csemachine import CSEMachine
+
+
+def aug_chain(size):
+    node = ASTNode(NodeKind.NIL)
+    for i in range(size // 2):
+        node = ASTNode(NodeKind.AUG, children=[node, ASTNode(NodeKind.INT, str(i))])
+    return node
+
+
+def nested_let(size):
+    bindings = size // 4
+    node = ASTNode(NodeKind.ID, f'x{bindings - 1}')
+    for i in range(bindings - 1, -1, -1):
+        value = ASTNode(NodeKind.INT, '0') if i == 0 else ASTNode(NodeKind.ID, f'x{i - 1}')
+        eq = ASTNode(NodeKind.EQUAL, children=[ASTNode(NodeKind.ID, f'x{i}'), value])
+        node = ASTNode(NodeKind.LET, children=[eq, node])
+    return node
+
+
+def count_nodes(root):
+    count = 0
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        count += 1
+        pending.extend(node.children)
+    return count
+
+
+SHAPES = [("aug-chain", aug_chain), ("nested-let", nested_let)]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10 ** 5, 10 ** 6]
+    print(f"{'shape':12s} {'nodes':>9s} {'standardize':>12s} {'build':>10s}")
+    for size in sizes:
+        for name, generate in SHAPES:
+            tree = generate(size)
+            nodes = count_nodes(tree)
+
+            start = time.perf_counter()
+            standardize(tree)
+            standardized = time.perf_counter()
+            CSEMachine().buildControlStructure(tree, 0)
+            built = time.perf_counter()
+
+            print(f"{name:12s} {nodes:9d} {standardized - start:11.3f}s {built - standardized:9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Lexer throughput benchmark in tokens per second.
+
+Usage: python benchmarks/bench_lexer.py [--against=REV] [megabytes ...]
+
+Generates RPAL sources of the given sizes (default 1, 4 and 16 MB) and times
+tokenize on each, and tokenize_iter streaming the same source from a file
+without keeping the tokens, in a fresh process per size. With --against=REV
+the lexer of that revision is timed as well; 2fcf29f^ is the scanner that
+rebuilt its regex per call. Revisions without tokenize_iter show only
+tokenize.
+"""
+import contextlib
+import json
+import sys
+import tempfile
+import time
+
+from revisions import PROJECT, interpreter_path, option, worktree, measure_in
+
+sys.path.insert(0, interpreter_path())
+
+from lexer import lexical_analyzer
+
+CHUNK = """let rec sum_{i} n acc = n eq 0 -> acc | sum_{i} (n - 1) (acc + n * {i}) // running total
+within pair_{i} (a, b) = a ge b -> 'first' | 'second {i}'
+in Print (sum_{i} {i} 0, pair_{i} ({i}, {i} ** 2), nil aug {i} aug 'x')
+"""
+
+
+def generate(megabytes):
+    target = int(megabytes * 1024 * 1024)
+    parts = []
+    size = 0
+    i = 0
+    while size < target:
+        part = CHUNK.format(i=i)
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def count(tokens):
+    return sum(1 for _ in tokens)
+
+
+def measure(megabytes):
+    """Tokens and seconds of each lexer this revision has."""
+    lexers = [("tokenize", lambda source, file: len(lexical_analyzer.tokenize(source)))]
+    if hasattr(lexical_analyzer, "tokenize_iter"):
+        lexers.append(("stream", lambda source, file: count(lexical_analyzer.tokenize_iter(file))))
+    source = generate(megabytes)
+    results = []
+    with tempfile.TemporaryFile("w+") as file:
+        file.write(source)
+        for name, lexer in lexers:
+            file.seek(0)
+            start = time.perf_counter()
+            tokens = lexer(source, file)
+            results.append((name, tokens, time.perf_counter() - start))
+    return results
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        print(json.dumps(measure(float(args[1]))))
+        return
+
+    revision = option(args, "--against")
+    sizes = [float(arg) for arg in args if not arg.startswith("--")] or [1, 4, 16]
+    with (worktree(revision) if revision else contextlib.nullcontext()) as tree:
+        trees = [(revision, tree)] if revision else []
+        trees.append(("current", PROJECT))
+        print(f"{'source':>8s} {'revision':10s} {'lexer':10s} {'tokens':>10s} {'seconds':>8s} {'tokens/s':>12s}")
+        for megabytes in sizes:
+            for label, path in trees:
+                for name, tokens, elapsed in measure_in(path, __file__, megabytes):
+                    print(f"{megabytes:6.1f}MB {label:10s} {name:10s} {tokens:10d} {elapsed:8.3f} "
+                          f"{tokens / elapsed:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
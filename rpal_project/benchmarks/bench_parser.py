@@ -0,0 +1,77 @@
+"""Parser throughput benchmark on expression-heavy sources.
+
+Usage: python benchmarks/bench_parser.py [--against=REV] [definitions ...]
+
+Generates a program of definitions whose bodies mix every boolean and
+arithmetic operator (default 10^4 and 5 * 10^4 definitions), tokenizes it
+once, and times parsing the tokens, best of three runs, in a fresh process.
+With --against=REV the parser of that revision is timed on the same source
+as well, and its trees are checked against the current parser's; 07614f8^
+is the recursive descent through parse_B, parse_Bt, parse_Bs, parse_Bp,
+parse_A, parse_At, parse_Af and parse_Ap.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+
+from revisions import PROJECT, interpreter_path, option, worktree, measure_in
+
+sys.path.insert(0, interpreter_path())
+
+from lexer.lexical_analyzer import tokenize
+from parser.parser import RPALParser
+
+EXPRESSIONS = [
+    "x{i} + y * 2 - z / 3 ** 2 gr {i} & not p or q",
+    "-x{i} * (y + {i}) ls z ** 2 ** 3 & a @f b",
+    "f x{i} y + g (x, y) - h 1 2 3 ge {i} or x eq y",
+    "(a + b) * (c - d) / (e ** {i}) ne 0 & b1 & b2 or not b3",
+]
+
+
+def generate(definitions):
+    # Simultaneous definitions keep the tree shallow, so comparing the
+    # printed trees stays linear
+    lines = [f"v{i} = {EXPRESSIONS[i % len(EXPRESSIONS)].format(i=i)}\n" for i in range(definitions)]
+    return "let " + "and ".join(lines) + "in v0\n"
+
+
+def measure(size):
+    """Best of three parses of a generated source, and a digest of its tree."""
+    tokens = tokenize(generate(size))
+    elapsed = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        tree = RPALParser(tokens).parse()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    digest = hashlib.sha256(tree.to_string().encode()).hexdigest()
+    return {"tokens": len(tokens), "seconds": elapsed, "tree": digest}
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        print(json.dumps(measure(int(args[1]))))
+        return
+
+    revision = option(args, "--against")
+    sizes = [int(float(arg)) for arg in args if not arg.startswith("--")] or [10 ** 4, 5 * 10 ** 4]
+    with (worktree(revision) if revision else contextlib.nullcontext()) as tree:
+        trees = [(revision, tree)] if revision else []
+        trees.append(("current", PROJECT))
+        print(f"{'parser':12s} {'tokens':>9s} {'seconds':>8s} {'tokens/s':>12s}")
+        for size in sizes:
+            digests = set()
+            for name, path in trees:
+                result = measure_in(path, __file__, size)
+                digests.add(result["tree"])
+                print(f"{name:12s} {result['tokens']:9d} {result['seconds']:8.3f} "
+                      f"{result['tokens'] / result['seconds']:12,.0f}")
+            assert len(digests) == 1, "parsers disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""AST printing benchmark on synthetic trees.
+
+Usage: python benchmarks/bench_print.py [--against=REV] [size ...]
+
+Builds a balanced tree of + nodes over integer leaves for each size (default
+10^5 and 10^6 nodes) and times writing it, in the -ast format, to a file and
+to a second file at the same time, the way myrpal.py -ast does, in a fresh
+process per size. With --against=REV the tree printer of that revision is
+timed as well; a revision without write_tree, such as 24fd5d2^, prints the
+tree once per output with print_tree.
+"""
+import contextlib
+import json
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from revisions import PROJECT, interpreter_path, option, worktree, measure_in
+
+sys.path.insert(0, interpreter_path())
+
+from ast.ast import ASTNode, NodeKind
+
+def balanced(size):
+    level = [ASTNode(NodeKind.INT, str(i)) for i in range((size + 1) // 2)]
+    while len(level) > 1:
+        paired = [ASTNode(NodeKind.PLUS, children=level[i:i + 2]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def measure(size):
+    tree = balanced(size)
+    with tempfile.TemporaryFile("w") as first, tempfile.TemporaryFile("w") as second:
+        start = time.perf_counter()
+        if hasattr(tree, "write_tree"):
+            tree.write_tree(first, second)
+        else:
+            for output in (first, second):
+                with redirect_stdout(output):
+                    tree.print_tree()
+        return time.perf_counter() - start
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        print(json.dumps(measure(int(args[1]))))
+        return
+
+    revision = option(args, "--against")
+    sizes = [int(float(arg)) for arg in args if not arg.startswith("--")] or [10 ** 5, 10 ** 6]
+    with (worktree(revision) if revision else contextlib.nullcontext()) as tree:
+        trees = [(revision, tree)] if revision else []
+        trees.append(("current", PROJECT))
+        print(f"{'printer':12s} {'nodes':>9s} {'seconds':>8s}")
+        for size in sizes:
+            for name, path in trees:
+                print(f"{name:12s} {size:9d} {measure_in(path, __file__, size):8.3f}")
+
+
+if __name__ == "__main__":
+    main()
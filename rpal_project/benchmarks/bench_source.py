@@ -0,0 +1,88 @@
+"""Source loading benchmark: time to first token, total lex time and peak RSS.
+
+Usage: python benchmarks/bench_source.py [megabytes ...]
+
+Writes generated RPAL sources of the given sizes (default 8 and 32 MB) to a
+temporary file and lexes each one with every loader in a fresh process, so
+that the peak RSS of one loader does not hide another's:
+
+  read     file.read() then tokenize, the way myrpal.py loaded sources before
+  stream   tokenize_iter over the text file, one line at a time
+  mmap     tokenize_iter over the mapped file, scanned as bytes (--mmap)
+
+The stream and mmap loaders count tokens without keeping them, as the parser
+does when it consumes them. Pages of the mapped file count towards the mmap
+loader's RSS, although the kernel can drop them at any time.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexical_analyzer import tokenize, tokenize_iter, map_source
+from benchmarks.bench_lexer import CHUNK
+
+LOADERS = ["read", "stream", "mmap"]
+
+
+# Written a chunk at a time: the children start with this process's RSS, so
+# it must not hold the whole source
+def write_source(file, megabytes):
+    target = int(megabytes * 1024 * 1024)
+    i = 0
+    while file.tell() < target:
+        file.write(CHUNK.format(i=i))
+        i += 1
+    file.flush()
+
+
+def tokens_of(loader, path, stack):
+    if loader == "read":
+        with open(path) as file:
+            yield from tokenize(file.read())
+    elif loader == "stream":
+        file = stack.enter_context(open(path))
+        yield from tokenize_iter(file)
+    else:
+        file = stack.enter_context(open(path, "rb"))
+        yield from tokenize_iter(stack.enter_context(map_source(file)))
+
+
+def measure(loader, path):
+    from contextlib import ExitStack
+    with ExitStack() as stack:
+        start = time.perf_counter()
+        tokens = tokens_of(loader, path, stack)
+        next(tokens)
+        first = time.perf_counter() - start
+        count = 1 + sum(1 for _ in tokens)
+        total = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{count} {first} {total} {peak}")
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        measure(sys.argv[2], sys.argv[3])
+        return
+
+    sizes = [float(arg) for arg in sys.argv[1:]] or [8, 32]
+    print(f"{'source':>8s} {'loader':8s} {'tokens':>10s} {'first ms':>9s} {'total s':>8s} {'peak MB':>8s}")
+    for megabytes in sizes:
+        with tempfile.NamedTemporaryFile("w", suffix=".rpal") as file:
+            write_source(file, megabytes)
+            for loader in LOADERS:
+                output = subprocess.run([sys.executable, __file__, "--child", loader, file.name],
+                                        capture_output=True, text=True, check=True).stdout
+                count, first, total, peak = output.split()
+                print(f"{megabytes:6.1f}MB {loader:8s} {int(count):10d} {float(first) * 1000:9.2f} "
+                      f"{float(total):8.3f} {float(peak):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Benchmark suite of representative RPAL workloads, with a regression check.
+
+Usage: python benchmarks/bench_suite.py [options] [workload ...]
+
+  --scale=X        multiply every workload's size by X (default 1)
+  --repeat=N       runs per workload; the fastest is kept (default 3)
+  --vm             evaluate on the bytecode backend
+  --baseline=FILE  baseline to compare against (default benchmarks/baseline.json)
+  --threshold=T    allowed slowdown or memory growth, as a fraction (default 0.25)
+  --save           write the results as the new baseline instead of comparing
+
+Each run is a fresh process, so that peak RSS belongs to one workload. The
+report gives the time of every phase, instructions per second and peak RSS.
+A workload regresses when its total time or peak RSS exceeds the baseline by
+more than the threshold, or when its output changes; any regression makes
+the exit status 1.
+
+Timings are only comparable on the machine that made them, so the baseline
+is local and not kept in the repository: a workload with no baseline yet is
+recorded on its first run, and --save records all of them again, e.g. after
+an intended change of performance.
+"""
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name, source with {n} for the size, default size
+WORKLOADS = [
+    ("fib", """
+let rec fib n = n ls 2 -> n | fib (n - 1) + fib (n - 2)
+in Print (fib {n})
+""", 18),
+    ("factorial", """
+let rec fact n = n eq 0 -> 1 | n * fact (n - 1)
+in Print (fact {n} gr 0)
+""", 600),
+    ("aug-list", """
+let rec build n = n eq 0 -> nil | (build (n - 1) aug n) in
+let rec total t n = n eq 0 -> 0 | t n + total t (n - 1) in
+let list = build {n}
+in Print (Order list, total list (Order list))
+""", 3000),
+    ("strings", """
+let rec repeat n = n eq 0 -> '' | Conc 'ab' (repeat (n - 1)) in
+let rec reverse s = s eq '' -> '' | Conc (reverse (Stern s)) (Stem s) in
+let rec count s = s eq '' -> 0 | (Stem s eq 'a' -> 1 | 0) + count (Stern s)
+in Print (count (reverse (repeat {n})))
+""", 300),
+    ("deep-tuples", """
+let rec nest n = n eq 0 -> nil | (n, nest (n - 1)) in
+let rec sum t = Order t eq 0 -> 0 | t 1 + sum (t 2)
+in Print (sum (nest {n}))
+""", 3000),
+    # even and odd call each other; even receives odd as an argument
+    ("mutual-recursion", """
+let even odd n = n eq 0 -> true | odd (n - 1) in
+let rec odd n = n eq 0 -> false | even odd (n - 1)
+in Print (even odd {n}, odd {n})
+""", 3000),
+]
+
+# One definition per line, each used by the next, then the result
+HUGE_LINE = "let f{i} (a, b) = a gr b -> f{p} (b, a) | (a + {i}) * b - a ** 2 / 3 in\n"
+
+
+def huge_source(n):
+    lines = ["let f0 (a, b) = a + b in\n"]
+    lines.extend(HUGE_LINE.format(i=i, p=i - 1) for i in range(1, n))
+    lines.append(f"Print (f{n - 1} (1, 2))\n")
+    return "".join(lines)
+
+
+def source_of(name, scale):
+    if name == "huge-source":
+        return huge_source(max(2, int(4000 * scale)))
+    for workload, template, size in WORKLOADS:
+        if workload == name:
+            return template.format(n=max(1, int(size * scale)))
+    raise KeyError(name)
+
+
+NAMES = [workload for workload, _, _ in WORKLOADS] + ["huge-source"]
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def measure(name, scale, mode):
+    """Run one workload in this process and print its measurements as JSON."""
+    from profiling import profile_program
+
+    source = source_of(name, scale)
+    result, profile = profile_program(io.StringIO(source), name, mode, False, counters=False)
+    evaluate = profile.phases.get("ApplyRules", profile.phases.get("execute"))
+    instructions = profile.counts["instructions executed"]
+    print(json.dumps({
+        "result": str(result),
+        "phases": profile.phases,
+        "total": sum(profile.phases.values()),
+        "instructions": instructions,
+        "instructions_per_second": instructions / evaluate if evaluate else 0,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def run(name, scale, mode, repeat):
+    """Fastest of repeat runs, each in a fresh process, with the lowest peak RSS."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, __file__, "--child", name, str(scale), mode],
+                                capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output)
+        if best is None or sample["total"] < best["total"]:
+            peak = sample["peak_mb"] if best is None else min(best["peak_mb"], sample["peak_mb"])
+            best = dict(sample, peak_mb=peak)
+        else:
+            best["peak_mb"] = min(best["peak_mb"], sample["peak_mb"])
+    return best
+
+
+def regressions(result, baseline, threshold):
+    problems = []
+    if result["result"] != baseline["result"]:
+        problems.append(f"output {result['result']!r} != {baseline['result']!r}")
+    if result["total"] > baseline["total"] * (1 + threshold):
+        problems.append(f"time {result['total'] / baseline['total']:.2f}x")
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + threshold):
+        problems.append(f"memory {result['peak_mb'] / baseline['peak_mb']:.2f}x")
+    return problems
+
+
+def option(args, name, default):
+    for arg in args:
+        if arg.startswith(name + "="):
+            return arg[len(name) + 1:]
+    return default
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        measure(args[1], float(args[2]), args[3])
+        return
+
+    scale = float(option(args, "--scale", 1))
+    repeat = int(option(args, "--repeat", 3))
+    threshold = float(option(args, "--threshold", 0.25))
+    baseline_path = option(args, "--baseline", BASELINE)
+    mode = "-vm" if "--vm" in args else "eval"
+    names = [arg for arg in args if not arg.startswith("--")] or NAMES
+    unknown = [name for name in names if name not in NAMES]
+    if unknown:
+        print(f"Unknown workload: {', '.join(unknown)}. Choose from: {', '.join(NAMES)}")
+        sys.exit(1)
+
+    key = f"{mode} x{scale:g}"
+    saved = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as file:
+            saved = json.load(file)
+    baseline = {} if "--save" in args else saved.get(key, {})
+
+    phases = ["tokenize", "parse", "standardize", "optimize", "buildControlStructure", "evaluate"]
+    print(f"{'workload':18s}" + "".join(f"{phase[:11]:>12s}" for phase in phases)
+          + f"{'total ms':>10s}{'instr/s':>12s}{'peak MB':>9s}  vs baseline")
+    results = {}
+    failed = False
+    for name in names:
+        result = run(name, scale, mode, repeat)
+        results[name] = result
+        times = dict(result["phases"])
+        times["evaluate"] = times.pop("ApplyRules", times.pop("execute", 0))
+        line = f"{name:18s}" + "".join(f"{times.get(phase, 0) * 1000:12.2f}" for phase in phases)
+        line += f"{result['total'] * 1000:10.1f}{result['instructions_per_second']:12,.0f}{result['peak_mb']:9.1f}"
+        if name in baseline:
+            problems = regressions(result, baseline[name], threshold)
+            failed = failed or bool(problems)
+            ratio = result["total"] / baseline[name]["total"]
+            line += f"  {ratio:.2f}x" + (f"  REGRESSION: {'; '.join(problems)}" if problems else "")
+        else:
+            line += "  (recorded)"
+        print(line)
+
+    recorded = {name: result for name, result in results.items() if name not in baseline}
+    if recorded:
+        saved.setdefault(key, {}).update(recorded)
+        with open(baseline_path, "w") as file:
+            json.dump(saved, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline for {key} of {', '.join(recorded)} written to {baseline_path}")
+    if failed:
+        print(f"Regressions beyond {threshold:.0%} against {baseline_path}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Run a benchmark against another revision of the interpreter.
+
+Benchmarks that compare new code with old take --against=REV. Rather than
+keeping a copy of the old code in the tree, REV is checked out into a
+temporary git worktree and the benchmark runs again in a child process that
+imports the interpreter from there. The child runs the current benchmark
+script, so only the interpreter differs between the two columns.
+"""
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# The rpal_project directory of this checkout
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Set in the child to the rpal_project directory of the worktree
+TREE_VARIABLE = "RPAL_BENCH_TREE"
+
+
+def interpreter_path():
+    """Directory to import the interpreter from: a worktree in a child, else this checkout."""
+    return os.environ.get(TREE_VARIABLE, PROJECT)
+
+
+def option(args, name, default=None):
+    for arg in args:
+        if arg.startswith(name + "="):
+            return arg[len(name) + 1:]
+    return default
+
+
+@contextlib.contextmanager
+def worktree(revision):
+    """Check revision out into a temporary worktree and yield its rpal_project directory."""
+    top = subprocess.run(["git", "-C", PROJECT, "rev-parse", "--show-toplevel"],
+                         capture_output=True, text=True, check=True).stdout.strip()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tree")
+        subprocess.run(["git", "-C", top, "worktree", "add", "--detach", "--quiet", path, revision], check=True)
+        try:
+            yield os.path.join(path, os.path.relpath(PROJECT, top))
+        finally:
+            subprocess.run(["git", "-C", top, "worktree", "remove", "--force", path], check=False)
+
+
+def measure_in(tree, script, *args):
+    """Run script --child args with the interpreter imported from tree, and
+    return the JSON it prints."""
+    environment = dict(os.environ, **{TREE_VARIABLE: tree})
+    child = subprocess.run([sys.executable, script, "--child", *map(str, args)],
+                           env=environment, capture_output=True, text=True)
+    if child.returncode:
+        sys.exit(f"{os.path.basename(script)} failed on the interpreter in {tree}:\n{child.stderr}")
+    return json.loads(child.stdout)
@@ -0,0 +1,260 @@
+from array import array
+from cse.csemachine import CSEMachine, RPALRuntimeError
+from cse.data_structures import *
+
+
+# Bytecode opcodes. Every instruction is an (opcode, operand) pair in one flat array.
+BC_CONST = 0      # push constants[operand]
+BC_LOAD = 1       # push the variable named constants[operand]
+BC_CLOSURE = 2    # push a closure over the current environment for Lambda constants[operand]
+BC_GAMMA = 3      # apply the top of the stack to the value below it
+BC_BINARY = 4     # apply the binary function constants[operand]
+BC_UNARY = 5      # apply the unary function constants[operand]
+BC_TUPLE = 6      # build a tuple from the top operand values
+BC_BRANCH = 7     # pop a truth value; false jumps to operand
+BC_JUMP = 8       # jump to operand
+BC_RETURN = 9     # return to the caller's frame, or stop in the outermost one
+
+# Shared code at the start of every program, entered by Rule 13: apply the
+# lambda to its Y* value, then apply the result to the original argument.
+YSTAR_STUB = 0
+
+
+class Program:
+    """Flat bytecode for a whole program.
+
+    code holds (opcode, operand) pairs. constants is the constant pool that
+    operands index into, and entries maps a lambda number to the offset of its
+    body.
+    """
+
+    def __init__(self):
+        self.code = array('l')
+        self.constants = []
+        self.entries = {}
+        self.start = 0
+        self.constantIndex = {}
+
+    def emit(self, opcode, operand=0):
+        self.code.append(opcode)
+        self.code.append(operand)
+        return len(self.code) - 1
+
+    def constant(self, value):
+        """Index of value in the constant pool, adding it if needed."""
+        key = (type(value), value) if isinstance(value, (int, str)) else id(value)
+        index = self.constantIndex.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.constantIndex[key] = index
+        return index
+
+
+# Compiles the control structures built by CSEMachine.buildControlStructure.
+# Each structure runs from its last item to its first, so it is emitted in
+# reverse. Conditional arms are inlined behind a branch and a jump; lambda
+# bodies become separate segments ending in BC_RETURN.
+def compileProgram(controlStruc):
+    program = Program()
+    program.emit(BC_GAMMA)
+    program.emit(BC_GAMMA)
+    program.emit(BC_RETURN)
+
+    program.start = len(program.code)
+    compileSegment(program, controlStruc, 0)
+    program.emit(BC_RETURN)
+
+    bodies = sorted({item.number for items in controlStruc for item in items if type(item) == Lambda})
+    for number in bodies:
+        program.entries[number] = len(program.code)
+        compileSegment(program, controlStruc, number)
+        program.emit(BC_RETURN)
+
+    return program
+
+
+def compileSegment(program, controlStruc, index):
+    # Work items: ("items", iterator) emits the rest of a structure, ("jump", cell)
+    # emits the jump over an else arm, ("else", offset, number) starts an else
+    # arm, and ("end", cell) patches that jump. The explicit stack keeps long
+    # conditional chains from recursing.
+    pending = [("items", iter(reversed(controlStruc[index])))]
+    while pending:
+        work = pending.pop()
+        match work[0]:
+            case "jump":
+                work[1].append(program.emit(BC_JUMP))
+                continue
+            case "else":
+                _, branch, number = work
+                program.code[branch] = len(program.code)
+                pending.append(("items", iter(reversed(controlStruc[number]))))
+                continue
+            case "end":
+                program.code[work[1][0]] = len(program.code)
+                continue
+
+        items = work[1]
+        for item in items:
+            match item:
+                case Constant():
+                    program.emit(BC_CONST, program.constant(item.value))
+                case Identifier():
+                    program.emit(BC_LOAD, program.constant(item.name))
+                case Lambda():
+                    program.emit(BC_CLOSURE, program.constant(item))
+                case Gamma():
+                    program.emit(BC_GAMMA)
+                case BinaryOperator():
+                    program.emit(BC_BINARY, program.constant(item.function))
+                case UnaryOperator():
+                    program.emit(BC_UNARY, program.constant(item.function))
+                case Tau():
+                    program.emit(BC_TUPLE, item.number)
+                case Beta():
+                    # In execution order the else Condition follows the beta,
+                    # then the then Condition.
+                    else_part = next(items)
+                    then_part = next(items)
+                    branch = program.emit(BC_BRANCH)
+                    jump = []
+                    pending.append(("items", items))
+                    pending.append(("end", jump))
+                    pending.append(("else", branch, else_part.number))
+                    pending.append(("jump", jump))
+                    pending.append(("items", iter(reversed(controlStruc[then_part.number]))))
+                    break
+
+
+class BytecodeMachine(CSEMachine):
+    """Runs a program compiled by compileProgram with an instruction pointer.
+
+    Entering a lambda body or a conditional arm jumps instead of copying the
+    structure onto the control, and calls keep (return address, environment)
+    frames. Values, environments, built-ins and result formatting are shared
+    with CSEMachine, which stays the reference backend.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.program = None
+        self.skipNext = False
+
+    # Conc consumes the gamma that follows it
+    def skipInstruction(self):
+        self.skipNext = True
+
+    def execute(self):
+        program = self.program
+        code = program.code
+        constants = program.constants
+        entries = program.entries
+        gammaRules = self.gammaRules
+        stack = self.stack.stack
+        push = stack.append
+        pop = stack.pop
+
+        frames = [] #(return address, environment) of the callers
+        env = self.currentEnv
+        ip = program.start
+        steps = 0
+        while True:
+            op = code[ip]
+            arg = code[ip + 1]
+            ip += 2
+            steps += 1
+
+            if op == BC_CONST:
+                push(constants[arg])
+
+            elif op == BC_LOAD:
+                try:
+                    push(env.lookup(constants[arg]))
+                except KeyError:
+                    raise RPALRuntimeError("Undeclared Identifier: " + constants[arg])
+
+            elif op == BC_CLOSURE:
+                template = constants[arg]
+                closure = Lambda(template.number)
+                closure.boundedVar = template.boundedVar
+                closure.environment = env
+                push(closure)
+
+            elif op == BC_GAMMA:
+                rator = pop()
+                rand = pop()
+                rator_type = type(rator)
+                if rator_type == Lambda:
+                    # A gamma right before a return is a tail call: the callee
+                    # returns straight to our caller.
+                    if code[ip] != BC_RETURN:
+                        frames.append((ip, env))
+                    env = self.bindEnvironment(rator, rand)
+                    ip = entries[rator.number]
+                elif rator_type == YStar:
+                    tempary = Lambda(rator.number)
+                    tempary.boundedVar = rator.boundedVar
+                    tempary.environment = rator.environment
+                    push(rand)
+                    push(rator)
+                    push(tempary)
+                    if code[ip] != BC_RETURN:
+                        frames.append((ip, env))
+                    ip = YSTAR_STUB
+                else:
+                    rule = gammaRules.get(rator_type)
+                    if rule is not None:
+                        rule(rator, rand)
+                    if self.skipNext:
+                        self.skipNext = False
+                        ip += 2
+
+            elif op == BC_BINARY:
+                rand_1 = pop()
+                rand_2 = pop()
+                push(constants[arg](rand_1, rand_2))
+
+            elif op == BC_UNARY:
+                push(constants[arg](pop()))
+
+            elif op == BC_TUPLE:
+                push(Tuple([pop() for _ in range(arg)]))
+
+            elif op == BC_BRANCH:
+                B = pop()
+                if B is False:
+                    ip = arg
+                elif B is not True:
+                    # Neither arm runs: continue after the jump over the else arm
+                    ip = code[arg - 1]
+
+            elif op == BC_JUMP:
+                ip = arg
+
+            elif op == BC_RETURN:
+                if not frames:
+                    break
+                ip, env = frames.pop()
+
+        self.steps = steps
+
+    def run(self, standardized_tree):
+        """Compile a standardized tree to bytecode and execute it."""
+        self.buildControlStructure(standardized_tree, 0)
+        return self.evaluate()
+
+    def evaluate(self):
+        """Compile the control structures built or loaded so far and execute them."""
+        self.program = compileProgram(self.controlStruc)
+
+        self.execute()
+        self.formatResult()
+
+        if self.print_present:
+            return self.stack[0]
+
+
+def BytecodeResult(standardized_tree):
+    """Evaluate a standardized tree on a fresh BytecodeMachine."""
+    return BytecodeMachine().run(standardized_tree)
@@ -0,0 +1,182 @@
+import hashlib
+import importlib
+import marshal
+import os
+import shutil
+import sys
+
+from cse.csemachine import binaryOperators, unaryOperators
+from cse.data_structures import (Lambda, Tau, Condition, Gamma, Beta, NoOp, Constant, Identifier,
+                                 BinaryOperator, UnaryOperator, Tuple)
+
+# Compiled programs are kept next to their source, the way Python keeps
+# bytecode in __pycache__: <dir>/__rpalcache__/<file>.rpalc
+CACHE_DIR = "__rpalcache__"
+MAGIC = b"RPALC2"
+
+# Modules whose code decides what a source compiles to
+COMPILER_MODULES = [
+    "lexer.lexical_analyzer",
+    "parser.parser",
+    "ast.ast",
+    "standardizer.standardizer",
+    "standardizer.optimizer",
+    "cse.csemachine",
+    "cse.data_structures",
+]
+
+_stamp = None
+
+
+def interpreter_stamp():
+    """Digest of the compiler's own source and the Python version.
+
+    Editing the lexer, parser, standardizer or control-structure builder
+    changes the stamp, so stale entries are never used.
+    """
+    global _stamp
+    if _stamp is None:
+        digest = hashlib.sha256(sys.version.encode())
+        for name in COMPILER_MODULES:
+            with open(importlib.import_module(name).__file__, "rb") as file:
+                digest.update(file.read())
+        _stamp = digest.digest()
+    return _stamp
+
+
+def source_key(source_path, variant=""):
+    """Key of a source file: a hash of its bytes, the interpreter stamp and
+    variant, which names any option that changes the compiled program."""
+    digest = hashlib.sha256(interpreter_stamp())
+    digest.update(variant.encode())
+    with open(source_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def cache_path(source_path):
+    directory, name = os.path.split(os.path.abspath(source_path))
+    return os.path.join(directory, CACHE_DIR, name + ".rpalc")
+
+
+def encode(controlStruc):
+    """Control structures as nested tuples of plain values, for marshal.
+
+    A cache file may come with an untrusted source file, so it holds only
+    data that decode checks item by item; reading it back cannot run code
+    the way unpickling can.
+    """
+    return tuple(tuple(encode_item(item) for item in structure) for structure in controlStruc)
+
+
+def encode_item(item):
+    match item:
+        case Lambda():
+            return ("lambda", item.number, item.boundedVar, item.line)
+        case Tau():
+            return ("tau", item.number)
+        case Condition():
+            return ("condition", item.number)
+        case Gamma():
+            return ("gamma",)
+        case Beta():
+            return ("beta",)
+        case NoOp():
+            return ("noop", item.name)
+        case Constant(value=Tuple(length=0)):
+            return ("nil",)
+        case Constant():
+            return ("constant", item.value)
+        case Identifier():
+            return ("identifier", item.name)
+        case BinaryOperator():
+            return ("binary", item.name)
+        case UnaryOperator():
+            return ("unary", item.name)
+    raise TypeError(f"Cannot cache control item {item!r}")
+
+
+def decode(encoded):
+    """Control structures written by encode. Raises ValueError for anything
+    encode could not have written."""
+    if type(encoded) is not tuple or any(type(structure) is not tuple for structure in encoded):
+        raise ValueError("Not a list of control structures")
+    count = len(encoded)
+    return [[decode_item(item, count) for item in structure] for structure in encoded]
+
+
+def decode_item(item, count):
+    match item:
+        case ("lambda", int() as number, str() as name, None | int() as line) if 0 < number < count:
+            decoded = Lambda(number)
+            decoded.boundedVar = name
+            decoded.line = line
+            return decoded
+        case ("tau", int() as size) if size >= 0:
+            return Tau(size)
+        case ("condition", int() as number) if 0 < number < count:
+            return Condition(number)
+        case ("gamma",):
+            return Gamma()
+        case ("beta",):
+            return Beta()
+        case ("noop", str() as name):
+            return NoOp(name)
+        case ("nil",):
+            return Constant(Tuple())
+        case ("constant", bool() | int() | str() as value):
+            return Constant(value)
+        case ("identifier", str() as name):
+            return Identifier(name)
+        case ("binary", str() as name) if name in binaryOperators:
+            return BinaryOperator(name, binaryOperators[name])
+        case ("unary", str() as name) if name in unaryOperators:
+            return UnaryOperator(name, unaryOperators[name])
+    raise ValueError(f"Not a control item: {item!r}")
+
+
+def load(source_path, key):
+    """Control structures cached for source_path under key, or None."""
+    try:
+        with open(cache_path(source_path), "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC or file.read(len(key)) != key:
+                return None
+            return decode(marshal.load(file))
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A damaged entry is treated as missing and rewritten
+        return None
+
+
+def save(source_path, key, controlStruc):
+    """Cache control structures for source_path. Failing to write is not an error."""
+    path = cache_path(source_path)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        encoded = encode(controlStruc)
+    except TypeError:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(MAGIC)
+            file.write(key)
+            marshal.dump(encoded, file)
+        os.replace(temporary, path)
+    except (OSError, ValueError):
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def clear(source_path):
+    """Remove the cache directory next to source_path."""
+    clear_directory(os.path.dirname(os.path.abspath(source_path)))
+
+
+def clear_directory(directory):
+    """Remove the cache of every source in directory."""
+    shutil.rmtree(os.path.join(directory, CACHE_DIR), ignore_errors=True)
@@ -1,108 +1,495 @@
-from ast.ast import ASTNode
+import operator
+from ast.ast import ASTNode, NodeKind, NAMES
 from cse.environment import Environment
 from cse.data_structures import *
 
 
-control = [] #Stack that holds the current execution instructions
-controlStruc = [] #Stores control structures (lambda, tau, conditions)
-count = 0
-environments = [Environment(0)]
-stack = Stack()                        
-print_present = False
-currentEnv= 0
+def aug(rand_1, rand_2):
+    if isinstance(rand_2, Tuple):
+        return rand_1 + rand_2
+    return rand_1.extend((rand_2,))
+
+binaryOperators = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.floordiv,
+    "**": operator.pow,
+    "gr": operator.gt,
+    "ge": operator.ge,
+    "ls": operator.lt,
+    "le": operator.le,
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "or": lambda rand_1, rand_2: rand_1 or rand_2,
+    "&": lambda rand_1, rand_2: rand_1 and rand_2,
+    "aug": aug,
+}
+unaryOperators = {
+    "neg": operator.neg,
+    "not": operator.not_,
+}
+# Work items of buildControlStructure
+VISIT, BRANCH, BETA = range(3)
+
 builtInFunctions = ["Order", "Print", "print", "Conc", "Stern", "Stem", "Isinteger", "Istruthvalue", "Isstring", "Istuple", "Isfunction", "ItoS"]
 
 
-def buildControlStructure(root_node, index):
-    global count
+class RPALRuntimeError(Exception):
+    """Raised when an RPAL program fails during evaluation.
+
+    The message is what the interpreter prints; exit_code is the status the
+    command-line entry points exit with.
+    """
+
+    def __init__(self, message, exit_code=1):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+class CSEMachine:
+    """Owns all evaluation state, so one process can evaluate any number of programs."""
+
+    def __init__(self):
+        self.control = [] #Stack that holds the current execution instructions
+        self.controlStruc = [] #Stores control structures (lambda, tau, conditions)
+        self.count = 0
+        self.envCount = 1 #Number of environments created so far; e_0 is the global one
+        self.stack = Stack()
+        self.print_present = False
+        self.currentEnv = Environment(0)
+        self.envStack = [] #Environments of the frames currently being evaluated
+        self.steps = 0 #Control items executed by ApplyRules
+        self.handlers = self.ruleHandlers()
+        self.gammaRules = self.gammaRuleTable()
+
+    # Walks the tree with an explicit work stack instead of recursion, so deep
+    # programs (long aug chains, nested lets) cannot hit Python's recursion limit.
+    # Items are visited in the same order as a recursive pre-order walk, which
+    # keeps lambda and condition numbering unchanged.
+    def buildControlStructure(self, root_node, index):
+        controlStruc = self.controlStruc
+
+        # Ensure controlStruc has enough sublists up to index
+        for _ in range(len(controlStruc), index + 1):
+            controlStruc.append([])
+
+        pending = [(VISIT, root_node, index)]
+        while pending:
+            action, node, index = pending.pop()
+
+            # Start a new numbered control structure for one arm of a conditional
+            if action == BRANCH:
+                controlStruc[index].append(Condition(self.newControlStructure()))
+                pending.append((VISIT, node, self.count))
+                continue
+            if action == BETA:
+                controlStruc[index].append(Beta())
+                continue
+
+            match node.kind:
+                case NodeKind.LAMBDA:
+                    lambda_node = node.children[0]
+
+                    new_lambda = Lambda(self.newControlStructure())
+                    new_lambda.line = node.line
+
+                    if lambda_node.kind == NodeKind.COMMA:
+                        bounded_vars = []
+                        for arg_node in lambda_node.children:
+                            bounded_vars.append(arg_node.value)
+                        new_lambda.boundedVar = ",".join(bounded_vars)
+                    else:
+                        # "()" binds nothing
+                        new_lambda.boundedVar = lambda_node.value or ""
+
+                    controlStruc[index].append(new_lambda)
+
+                    body_index = self.count
+                    for i in range(len(node.children) - 1, 0, -1):
+                        pending.append((VISIT, node.children[i], body_index))
+                case NodeKind.TAU:
+                    tau_size = len(node.children)
+                    tau_obj = Tau(tau_size)
+                    controlStruc[index].append(tau_obj)
+                    for tau_child in reversed(node.children):
+                        pending.append((VISIT, tau_child, index))
+                case NodeKind.COND:
+                    # then-arm, else-arm, beta, then the condition itself
+                    pending.append((VISIT, node.children[0], index))
+                    pending.append((BETA, node, index))
+                    pending.append((BRANCH, node.children[2], index))
+                    pending.append((BRANCH, node.children[1], index))
+                case _:
+                    controlStruc[index].append(decodeNode(node))
+                    for general_child in reversed(node.children):
+                        pending.append((VISIT, general_child, index))
+
+    def newControlStructure(self):
+        """Allocate the next numbered control structure and return its number."""
+        self.count += 1
+        # Ensure controlStruc has enough sublists up to the new number
+        for _ in range(len(self.controlStruc), self.count + 1):
+            self.controlStruc.append([])
+        return self.count
+
+    # Conc takes both strings at once, so the gamma that would apply its
+    # partial application is dropped.
+    def skipInstruction(self):
+        self.control.pop()
+
+    # Built-in function handling
+    def built(self, function, argument):
+        stack = self.stack
+
+        match function:
+            case "Order":
+                stack.push(len(argument))
+
+            case "Print" | "print":
+                self.print_present = True
+                if isinstance(argument, str):
+                    argument = argument.replace("\\n", "\n").replace("\\t", "\t")
+                stack.push(argument)
+
+            case "Conc":
+                stack_latter = stack.pop()
+                self.skipInstruction()
+                stack.push(argument + stack_latter)
+
+            case "Stern":
+                stack.push(argument[1:])
+
+            case "Stem":
+                stack.push(argument[0])
+
+            case "Isinteger":
+                stack.push(isinstance(argument, int))
+
+            case "Istruthvalue":
+                stack.push(isinstance(argument, bool))
+
+            case "Isstring":
+                stack.push(isinstance(argument, str))
+
+            case "Istuple":
+                stack.push(isinstance(argument, Tuple))
+
+            case "Isfunction":
+                return argument in builtInFunctions
+
+            case "ItoS":
+                if isinstance(argument, int):
+                    stack.push(str(argument))
+                else:
+                    raise RPALRuntimeError("Error: ItoS function can only accept integers.", exit_code=0)
+
+    #Implements the CSE machine's 13 rules. Each control item carries an opcode
+    #that indexes straight into the handler table, so every step is one dispatch.
+    def ApplyRules(self):
+        control = self.control
+        pop = control.pop
+        handlers = self.handlers
+
+        steps = 0
+        while control:
+            latter = pop()
+            steps += 1
+            handlers[latter.opcode](latter)
+        self.steps = steps
+
+        self.formatResult()
+
+    def ruleHandlers(self):
+        """Build the opcode -> handler table used by ApplyRules."""
+        handlers = [None] * OPCODE_COUNT
+        handlers[OP_CONSTANT] = self.pushConstant
+        handlers[OP_IDENTIFIER] = self.lookupIdentifier
+        handlers[OP_LAMBDA] = self.makeClosure
+        handlers[OP_GAMMA] = self.applyGamma
+        handlers[OP_ENV_MARKER] = self.exitEnvironment
+        handlers[OP_BINARY] = self.applyBinary
+        handlers[OP_UNARY] = self.applyUnary
+        handlers[OP_BETA] = self.chooseBranch
+        handlers[OP_TAU] = self.buildTuple
+        handlers[OP_NOP] = self.skip
+        return handlers
+
+    def gammaRuleTable(self):
+        """Build the second-level table for Rule 4, keyed by the type of the rator."""
+        return {
+            Lambda: self.applyLambda,
+            Tuple: self.indexTuple,
+            YStar: self.applyYStar,
+            str: self.applyNamed,
+        }
+
+    # Rule 1
+    def pushConstant(self, latter):
+        self.stack.push(latter.value)
+
+    # Rule 1
+    def lookupIdentifier(self, latter):
+        try:
+            self.stack.push(self.currentEnv.lookup(latter.name))
+        except KeyError:
+            raise RPALRuntimeError("Undeclared Identifier: " + latter.name)
+
+    # Rule 2
+    def makeClosure(self, latter):
+        tempary = Lambda(latter.number)
+        tempary.boundedVar = latter.boundedVar
+        tempary.addEnvironment(self.currentEnv)
+        self.stack.push(tempary)
+
+    # Rule 4: the rator's type selects the rule to apply
+    def applyGamma(self, latter):
+        stack = self.stack
+        stack_latter_1 = stack.pop()
+        stack_latter_2 = stack.pop()
+
+        rule = self.gammaRules.get(type(stack_latter_1))
+        if rule is not None:
+            rule(stack_latter_1, stack_latter_2)
+
+    # Rule 11: If it's a Lambda
+    def applyLambda(self, stack_latter_1, stack_latter_2):
+        control = self.control
+        stack = self.stack
+
+        lambda_number = stack_latter_1.number
+
+        # Tail call: the caller's exit marker is next on the control and on top
+        # of the value stack, so the caller has nothing left to do. Drop its
+        # frame now instead of keeping it until the callee returns.
+        if control and stack.stack and control[-1] is stack.stack[-1]:
+            control.pop()
+            stack.pop()
+            self.envStack.pop()
 
-    # Ensure controlStruc has enough sublists up to index
-    for _ in range(len(controlStruc), index + 1):
-        controlStruc.append([])
+        child = self.bindEnvironment(stack_latter_1, stack_latter_2)
+        self.currentEnv = child
 
-    match root_node.type:
-        case "lambda":
-            count += 1
-            lambda_node = root_node.children[0]
+        marker = EnvMarker(child)
+        self.envStack.append(child)
+        stack.push(marker)
+        control.append(marker)
+        control += self.controlStruc[lambda_number]
 
-            new_lambda = Lambda(count)
+    def bindEnvironment(self, closure, argument):
+        """Create the environment for applying closure to argument (Rule 11)."""
+        boundedVar = closure.boundedVar
 
-            if lambda_node.type == ",":
-                bounded_vars = []
-                for arg_node in lambda_node.children:
-                    bounded_vars.append(arg_node.type[4:-1])
-                new_lambda.boundedVar = ",".join(bounded_vars)
-            else:
-                new_lambda.boundedVar = lambda_node.type[4:-1]
+        # The closure and the environment stack are the only references to the
+        # new environment, so it is reclaimed once both are gone.
+        child = Environment(self.envCount)
+        self.envCount += 1
+        child.addParent(closure.environment)
 
-            controlStruc[index].append(new_lambda)
+        # Rule 11: Binding variables
+        variablesL = boundedVar.split(",")
 
-            for i in range(1, len(root_node.children)):
-                buildControlStructure(root_node.children[i], count)
-        case "tau":
-            tau_size = len(root_node.children)
-            tau_obj = Tau(tau_size)
-            controlStruc[index].append(tau_obj)
-            for tau_child in root_node.children:
-                buildControlStructure(tau_child, index)
-        case "->":
-            count += 1
-            cond1 = Condition(count)
-            controlStruc[index].append(cond1)
-            buildControlStructure(root_node.children[1], count)
+        if len(variablesL) > 1:
+            i = 0
+            while i < len(variablesL):
+                child.addVar(variablesL[i], argument[i])
+                i += 1
+        else:
+            child.addVar(boundedVar, argument)
+        return child
+
+    # Rule 10: If it's a tuple
+    def indexTuple(self, stack_latter_1, stack_latter_2):
+        self.stack.push(stack_latter_1[stack_latter_2 - 1])
+
+    # Rule 13: If it's a YStar instance
+    def applyYStar(self, stack_latter_1, stack_latter_2):
+        stack = self.stack
+        control = self.control
+        tempary = Lambda(stack_latter_1.number)
+        tempary.boundedVar = stack_latter_1.boundedVar
+        tempary.environment = stack_latter_1.environment
+
+        control.append(Gamma())
+        control.append(Gamma())
+        stack.push(stack_latter_2)
+        stack.push(stack_latter_1)
+        stack.push(tempary)
+
+    # Rule 12 for "Y*", otherwise a built-in function
+    def applyNamed(self, stack_latter_1, stack_latter_2):
+        if stack_latter_1 == "Y*":
+            tempary = YStar(stack_latter_2.number)
+            tempary.boundedVar = stack_latter_2.boundedVar
+            tempary.environment = stack_latter_2.environment
+            self.stack.push(tempary)
+        elif stack_latter_1 in builtInFunctions:
+            self.built(stack_latter_1, stack_latter_2)
+
+    # Rule 5
+    def exitEnvironment(self, latter):
+        stack = self.stack
+        stack_latter = stack.pop()
+        stack.pop()
+
+        envStack = self.envStack
+        envStack.pop()
+        if envStack:
+            self.currentEnv = envStack[-1]
+
+        stack.push(stack_latter)
+
+    # Rule 6
+    def applyBinary(self, latter):
+        stack = self.stack
+        rand_1 = stack.pop()
+        rand_2 = stack.pop()
+        stack.push(latter.function(rand_1, rand_2))
+
+    # Rule 7
+    def applyUnary(self, latter):
+        stack = self.stack
+        stack.push(latter.function(stack.pop()))
+
+    # Rule 8
+    def chooseBranch(self, latter):
+        control = self.control
+        B = self.stack.pop()
+        else_part = control.pop()
+        then_part = control.pop()
+        match B:
+            case True:
+                control += self.controlStruc[then_part.number]
+            case False:
+                control += self.controlStruc[else_part.number]
+
+    # Rule 9
+    def buildTuple(self, latter):
+        stack = self.stack
+        n = latter.number
+        tau_list = []
+        i = 0
+        while i < n:
+            tau_list.append(stack.pop())
+            i += 1
 
-            count += 1
-            cond2 = Condition(count)
-            controlStruc[index].append(cond2)
-            buildControlStructure(root_node.children[2], count)
+        tau_tuple = Tuple(tau_list)
+        stack.push(tau_tuple)
 
-            controlStruc[index].append("beta")
-            buildControlStructure(root_node.children[0], index)
+    # Items that are not CSE instructions are ignored
+    def skip(self, latter):
+        pass
 
+    def formatResult(self):
+        stack = self.stack
 
-        case _:
-            controlStruc[index].append(root_node.type)
-            for general_child in root_node.children:
-                buildControlStructure(general_child, index)
+        if type(stack[0]) == Tuple:
+            stack[0] = stack[0].toPython()
 
-def parse_token(token_name):
-    trimmed_name = token_name[1:-1]
-    parts = trimmed_name.split(":")
+        # Lambda expression becomes a lambda closure when its environment is determined.
+        if type(stack[0]) == Lambda:
+            stack[0] = "[lambda closure: " + str(stack[0].boundedVar) + ": " + str(stack[0].number) + "]"
 
-    if len(parts) == 1:
-        value = parts[0]
-    else:
-        data_type, value = parts[0], parts[1]
+        if type(stack[0]) == tuple:
 
-        match data_type:
-            case "INT":
-                return int(value)
+            i = 0
+            while i < len(stack[0]):
+                if type(stack[0][i]) == bool:
+                    stack[0] = list(stack[0])
+                    stack[0][i] = str(stack[0][i]).lower()
+                    stack[0] = tuple(stack[0])
+                i += 1
 
-            case "ID":
-                if value in builtInFunctions:
-                    return value
-                try:
-                    return environments[currentEnv].variables[value]
-                except KeyError:
-                    print("Undeclared Identifier: " + value)
-                    exit(1)
 
-            case "STR":
-                return value
 
+            match len(stack[0]):
+                case 1:
+                    stack[0] = "(" + str(stack[0][0]) + ")"
+                case _:
+                    if any(isinstance(element, str) for element in stack[0]):
+                        tempary = "("
+                        i = 0
+                        while i < len(stack[0]):
+                            tempary += str(stack[0][i]) + ", "
+                            i += 1
+                        tempary = tempary[:-2] + ")"
+                        stack[0] = tempary
+
+
+
+        if stack[0] == True or stack[0] == False:
+            stack[0] = str(stack[0]).lower()
+
+    def run(self, standardized_tree):
+        """Build the control structures for a standardized tree and evaluate them."""
+        self.buildControlStructure(standardized_tree, 0)
+        return self.evaluate()
+
+    def load(self, controlStruc):
+        """Use control structures built earlier, e.g. read back from the program cache."""
+        self.controlStruc = controlStruc
+        self.count = len(controlStruc) - 1
+
+    def evaluate(self):
+        """Evaluate the control structures built or loaded so far."""
+        #print_control_structures(self.controlStruc)
+        self.envStack.append(self.currentEnv)
+        self.control.append(EnvMarker(self.currentEnv))
+        self.control += self.controlStruc[0]
+
+        self.ApplyRules()
+
+        if self.print_present:
+            return self.stack[0]
+
+
+# Decodes an AST type string such as "<ID:x>" or "+" into an instruction once,
+# so that executing it needs no string parsing.
+def decodeNode(node):
+    """Control item for a tree node other than lambda, tau and ->."""
+    match node.kind:
+        case NodeKind.ID:
+            if node.value in builtInFunctions:
+                return Constant(node.value)
+            return Identifier(node.value)
+        case NodeKind.INT:
+            return Constant(int(node.value))
+        case NodeKind.STR:
+            return Constant(node.value)
+        case _:
+            return decodeInstruction(NAMES[node.kind])
 
-    
-    match value:
-        case "Y*":
-            return "Y*"
-        case "true":
-            return True
-        case "false":
-            return False
-        case "nil":
-            return ()
+
+def decodeInstruction(token_name):
+    if token_name in binaryOperators:
+        return BinaryOperator(token_name, binaryOperators[token_name])
+    if token_name in unaryOperators:
+        return UnaryOperator(token_name, unaryOperators[token_name])
+    if token_name == "gamma":
+        return Gamma()
+    if token_name == "beta":
+        return Beta()
+    if not (token_name[:1] == "<" and token_name[-1:] == ">"):
+        return NoOp(token_name)
+
+    trimmed_name = token_name[1:-1]
+    parts = trimmed_name.split(":", 1)
+
+    if len(parts) == 1:
+        return Constant(convert_value(parts[0]))
+
+    data_type, value = parts
+    match data_type:
+        case "INT":
+            return Constant(int(value))
+        case "ID":
+            if value in builtInFunctions:
+                return Constant(value)
+            return Identifier(value)
+        case "STR":
+            return Constant(value)
         case _:
-            return value
+            return Constant(convert_value(value))
 
 
 def convert_value(value):
@@ -114,272 +501,10 @@ def convert_value(value):
         case "false":
             return False
         case "nil":
-            return ()
+            return Tuple()
         case _:
             return value
 
-# Built-in function handling
-def built(function, argument):
-    global print_present
-
-    match function:
-        case "Order":
-            stack.push(len(argument))
-
-        case "Print" | "print":
-            print_present = True
-            if isinstance(argument, str):
-                argument = argument.replace("\\n", "\n").replace("\\t", "\t")
-            stack.push(argument)
-
-        case "Conc":
-            stack_latter = stack.pop()
-            control.pop()
-            stack.push(argument + stack_latter)
-
-        case "Stern":
-            stack.push(argument[1:])
-
-        case "Stem":
-            stack.push(argument[0])
-
-        case "Isinteger":
-            stack.push(isinstance(argument, int))
-
-        case "Istruthvalue":
-            stack.push(isinstance(argument, bool))
-
-        case "Isstring":
-            stack.push(isinstance(argument, str))
-
-        case "Istuple":
-            stack.push(isinstance(argument, tuple))
-
-        case "Isfunction":
-            return argument in builtInFunctions
-
-        case "ItoS":
-            if isinstance(argument, int):
-                stack.push(str(argument))
-            else:
-                print("Error: ItoS function can only accept integers.")
-                exit()
-
-#Implements the CSE machine's 13 rules through pattern matching
-def ApplyRules():
-    uop = ["neg", "not"]
-    op = ["+", "-", "*", "/", "**", "gr", "ge", "ls", "le", "eq", "ne", "or", "&", "aug"]
-    
-
-    global control
-    global currentEnv
-
-    while(len(control) > 0):
-     
-        latter = control.pop()
-
-        # Rule 1
-        if type(latter) == str and (latter[-1] == ">" and latter[0] == "<" ):
-            stack.push(parse_token(latter))
-        
-
-    
-
-        # Rule 2
-        elif type(latter) == Lambda:
-            tempary = Lambda(latter.number)
-            tempary.boundedVar = latter.boundedVar
-            tempary.addEnvironment(currentEnv)
-            stack.push(tempary)
-
-        # Rule 4
-        elif (latter == "gamma"):
-            stack_latter_1 = stack.pop()
-            stack_latter_2 = stack.pop()
-
-            match stack_latter_1:
-                # Rule 11: If it's a Lambda
-                case Lambda():
-
-                    boundedVar = stack_latter_1.boundedVar
-                    lambda_number = stack_latter_1.number
-                    parent_environment_number = stack_latter_1.environment
-                    currentEnv = len(environments)
-                    
-                    parent = environments[parent_environment_number]
-                    child = Environment(currentEnv)
-                    child.addParent(parent)
-                    parent.addChild(child)
-                    environments.append(child)
-
-                    # Rule 11: Binding variables
-                    variablesL = boundedVar.split(",")
-
-                    if len(variablesL) > 1:
-                        i = 0
-                        while i < len(variablesL):
-                            child.addVar(variablesL[i], stack_latter_2[i])
-                            i += 1
-                    else:
-                        child.addVar(boundedVar, stack_latter_2)
-
-                    stack.push(child.name)
-                    control.append(child.name)
-                    control += controlStruc[lambda_number]
-
-                # Rule 10: If it's a tuple
-                case tuple():
-                    stack.push(stack_latter_1[stack_latter_2 - 1])
-
-                # Rule 12: If it's "Y*"
-                case "Y*":
-                    tempary = YStar(stack_latter_2.number)
-                    tempary.boundedVar = stack_latter_2.boundedVar
-                    tempary.environment = stack_latter_2.environment
-                    stack.push(tempary)
-
-                # Rule 13: If it's a YStar instance
-                case YStar():
-                    tempary = Lambda(stack_latter_1.number)
-                    tempary.boundedVar = stack_latter_1.boundedVar
-                    tempary.environment = stack_latter_1.environment
-                    
-                    control.append("gamma")
-                    control.append("gamma")
-                    stack.push(stack_latter_2)
-                    stack.push(stack_latter_1)
-                    stack.push(tempary)
-
-                # Built-in functions
-                case _ if stack_latter_1 in builtInFunctions:
-                    built(stack_latter_1, stack_latter_2)
-
-                        
-        # Rule 5
-        elif type(latter) == str and (latter[0:2] == "e_"):
-            stack_latter = stack.pop()
-            stack.pop()
-            
-            if currentEnv != 0:
-                for element in reversed(stack):
-                    match element:
-                        case str() if element.startswith("e_"):
-                            currentEnv = int(element[2:])
-                            break
-
-            stack.push(stack_latter)
-
-        # Rule 6
-        elif (latter in op):
-            rand_1 = stack.pop()
-            rand_2 = stack.pop()
-            #print("DEBUG: rand_1 =", rand_1, "| type:", type(rand_1))
-            #print("DEBUG: rand_2 =", rand_2, "| type:", type(rand_2))
-
-            match latter:
-                case "+":
-                    stack.push(rand_1 + rand_2)
-                case "-":
-                    stack.push(rand_1 - rand_2)
-                case "*":
-                    stack.push(rand_1 * rand_2)
-                case "/":
-                    stack.push(rand_1 // rand_2)
-                case "**":
-                    stack.push(rand_1 ** rand_2)
-                case "gr":
-                    stack.push(rand_1 > rand_2)
-                case "ge":
-                    stack.push(rand_1 >= rand_2)
-                case "ls":
-                    stack.push(rand_1 < rand_2)
-                case "le":
-                    stack.push(rand_1 <= rand_2)
-                case "eq":
-                    stack.push(rand_1 == rand_2)
-                case "ne":
-                    stack.push(rand_1 != rand_2)
-                case "or":
-                    stack.push(rand_1 or rand_2)
-                case "&":
-                    stack.push(rand_1 and rand_2)
-                case "aug":
-                    if isinstance(rand_2, tuple):
-                        stack.push(rand_1 + rand_2)
-                    else:
-                        stack.push(rand_1 + (rand_2,))
-
-
-        # Rule 7
-        elif (latter in uop):
-            rand = stack.pop()
-            match latter:
-                case "not":
-                    stack.push(not rand)
-                case "neg":
-                    stack.push(-rand)
-
-
-        # Rule 8
-        elif (latter == "beta"):
-            B = stack.pop()
-            else_part = control.pop()
-            then_part = control.pop()
-            match B:
-                case True:
-                    control += controlStruc[then_part.number]
-                case False:
-                    control += controlStruc[else_part.number]
-
-        # Rule 9
-        elif type(latter) == Tau:
-            n = latter.number
-            tau_list = []
-            i = 0
-            while i < n:
-                tau_list.append(stack.pop())
-                i += 1
-
-            tau_tuple = tuple(tau_list)
-            stack.push(tau_tuple)
-
-        elif (latter == "Y*"):
-            stack.push(latter)
-
-    # Lambda expression becomes a lambda closure when its environment is determined.
-    if type(stack[0]) == Lambda:
-        stack[0] = "[lambda closure: " + str(stack[0].boundedVar) + ": " + str(stack[0].number) + "]"
-         
-    if type(stack[0]) == tuple:          
-         
-        i = 0
-        while i < len(stack[0]):
-            if type(stack[0][i]) == bool:
-                stack[0] = list(stack[0])
-                stack[0][i] = str(stack[0][i]).lower()
-                stack[0] = tuple(stack[0])
-            i += 1
-
-                
-          
-        match len(stack[0]):
-            case 1:
-                stack[0] = "(" + str(stack[0][0]) + ")"
-            case _:
-                if any(isinstance(element, str) for element in stack[0]):
-                    tempary = "("
-                    i = 0
-                    while i < len(stack[0]):
-                        tempary += str(stack[0][i]) + ", "
-                        i += 1
-                    tempary = tempary[:-2] + ")"
-                    stack[0] = tempary
-
-                
-        
-    if stack[0] == True or stack[0] == False:
-        stack[0] = str(stack[0]).lower()
-
 # For debugging purposes
 def print_control_structures(controlStruc):
     for i, cs in enumerate(controlStruc):
@@ -391,18 +516,19 @@ def print_control_structures(controlStruc):
                 print(f"  tau({item.number})")
             elif isinstance(item, Condition):
                 print(f"  condition {item.number}")
+            elif isinstance(item, Constant):
+                print(f"  constant {item.value!r}")
+            elif isinstance(item, Identifier):
+                print(f"  <ID:{item.name}>")
+            elif isinstance(item, (BinaryOperator, UnaryOperator, NoOp)):
+                print(f"  {item.name}")
+            elif isinstance(item, Gamma):
+                print("  gamma")
+            elif isinstance(item, Beta):
+                print("  beta")
             else:
                 print(f"  {item}")
 
 def Result(standardized_tree):
-    global control
-    buildControlStructure(standardized_tree, 0)
-    #print_control_structures(controlStruc)
-    control.append(environments[0].name)
-    control += controlStruc[0]
-    
-    ApplyRules()
-    stack.push(environments[0].name)
-
-    if print_present:
-        return stack[0]
\ No newline at end of file
+    """Evaluate a standardized tree on a fresh CSEMachine."""
+    return CSEMachine().run(standardized_tree)
@@ -1,22 +1,95 @@
+# Opcodes of control items; CSEMachine.ApplyRules indexes its handler table with them
+OP_CONSTANT = 0
+OP_IDENTIFIER = 1
+OP_LAMBDA = 2
+OP_GAMMA = 3
+OP_ENV_MARKER = 4
+OP_BINARY = 5
+OP_UNARY = 6
+OP_BETA = 7
+OP_TAU = 8
+OP_NOP = 9
+OPCODE_COUNT = 10
+
 #Represents lambda expressions with bound variables
 class Lambda:
+    opcode = OP_LAMBDA
+
     def __init__(self, number):
         self.number = number
         self.boundedVar = None
         self.environment = None
+        self.line = None #Source line of the lambda, for the sampling profiler
     def addEnvironment(self, environment):
         self.environment = environment
 
 # Tuple construction handling
 class Tau:
+    opcode = OP_TAU
+
     def __init__(self, number):
         self.number = number
         
 # Handle -> nodes
 class Condition:
+    opcode = OP_NOP
+
     def __init__(self, number):
         self.number = number
 
+# Function application
+class Gamma:
+    opcode = OP_GAMMA
+
+# Selects the then/else control structure of a conditional
+class Beta:
+    opcode = OP_BETA
+
+# Non-instruction node left in a control structure; executing it does nothing
+class NoOp:
+    opcode = OP_NOP
+
+    def __init__(self, name):
+        self.name = name
+
+
+# Pre-decoded literal (<INT:..>, <STR:..>, <true>, <nil>, ...) and built-in names
+class Constant:
+    opcode = OP_CONSTANT
+
+    def __init__(self, value):
+        self.value = value
+
+# Pre-decoded <ID:..> reference resolved in the current environment
+class Identifier:
+    opcode = OP_IDENTIFIER
+
+    def __init__(self, name):
+        self.name = name
+
+# Binary operators applied by Rule 6
+class BinaryOperator:
+    opcode = OP_BINARY
+
+    def __init__(self, name, function):
+        self.name = name
+        self.function = function
+
+# Unary operators applied by Rule 7
+class UnaryOperator:
+    opcode = OP_UNARY
+
+    def __init__(self, name, function):
+        self.name = name
+        self.function = function
+
+# Marks where an environment's frame begins on the control and value stacks
+class EnvMarker:
+    opcode = OP_ENV_MARKER
+
+    def __init__(self, environment):
+        self.environment = environment
+
 
 class YStar:
     def __init__(self, number):
@@ -24,6 +97,65 @@ class YStar:
         self.boundedVar = None
         self.environment = None 
         
+# RPAL tuple value. Tuples grown by aug share one item list: extending the
+# tuple that ends at the end of the list appends in place, while every older
+# tuple keeps seeing only its own prefix. Building an n-tuple with aug is
+# therefore O(n) overall instead of O(n^2).
+class Tuple:
+    __slots__ = ("items", "length")
+
+    def __init__(self, items=None, length=None):
+        self.items = items if items is not None else []
+        self.length = len(self.items) if length is None else length
+
+    def extend(self, values):
+        """Return this tuple followed by values, sharing the item list when possible."""
+        items = self.items
+        if self.length and self.length == len(items):
+            items.extend(values)
+        else:
+            items = items[:self.length]
+            items.extend(values)
+        return Tuple(items, len(items))
+
+    def toPython(self):
+        """Convert to a native tuple, nested tuples included."""
+        return tuple(item.toPython() if type(item) == Tuple else item for item in self)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Tuple(self.items[:self.length][index])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("tuple index out of range")
+        return self.items[index]
+
+    def __iter__(self):
+        items = self.items
+        for i in range(self.length):
+            yield items[i]
+
+    def __add__(self, other):
+        if type(other) != Tuple:
+            return NotImplemented
+        return self.extend(other)
+
+    def __eq__(self, other):
+        if type(other) != Tuple:
+            return NotImplemented
+        return self.length == other.length and all(a == b for a, b in zip(self, other))
+
+    def __hash__(self):
+        return hash(self.toPython())
+
+    def __repr__(self):
+        return repr(self.toPython())
+
+
 class Stack:
     def __init__(self):
         self.stack = []      
@@ -45,7 +177,7 @@ class Stack:
     def push(self, item):
         self.stack.append(item)
     def pop(self):
-        if not self.Empty():
+        if self.stack:
             return self.stack.pop()
 
     
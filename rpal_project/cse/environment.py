@@ -3,7 +3,6 @@ class Environment:
         self.name= f"e_{number}"
         self.variables= {}
         self.parent=None
-        self.children=[]
     
 
     def addVar(self, key, value):
@@ -16,8 +15,12 @@ class Environment:
         """Set the parent environment."""
         self.parent = parent
 
-    def addChild(self, child):
-        """Add a child environment and inherit variables from parent."""
-        self.children.append(child)
-        child.variables.update(self.variables)
-    
\ No newline at end of file
+    def lookup(self, key):
+        """Find a variable in this environment or the nearest enclosing one."""
+        env = self
+        while env is not None:
+            variables = env.variables
+            if key in variables:
+                return variables[key]
+            env = env.parent
+        raise KeyError(key)
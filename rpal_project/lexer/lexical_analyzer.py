@@ -1,4 +1,7 @@
+import mmap
+import os
 import re
+from contextlib import contextmanager
 from enum import Enum, auto
 
 class TokenType(Enum):
@@ -11,10 +14,17 @@ class TokenType(Enum):
     COMMENT = auto()
     EOF = auto()
 
+class LexicalError(RuntimeError):
+    """Raised for source text that is not a sequence of RPAL tokens."""
+
 class Token:
-    def __init__(self, token_type, value):
+    __slots__ = ("type", "value", "line", "column")
+
+    def __init__(self, token_type, value, line=None, column=None):
         self.type = token_type
         self.value = value
+        self.line = line
+        self.column = column
 
     def __repr__(self):
         return f"{self.type.name}: {self.value}"
@@ -39,39 +49,150 @@ KEYWORDS = {
     'nil', 'dummy', 'within', 'and', 'rec'
 }
 
+# Compiled once at import; tokenize only runs it
+TOKEN_REGEX = re.compile('|'.join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPECIFICATION))
+
+# The same pattern over bytes, for scanning mapped files without decoding
+# them. A file read as text has its line ends translated by universal
+# newlines, so here \r\n and a lone \r end a line as well.
+BYTES_TOKEN_SPECIFICATION = [
+    (name, {"COMMENT": r"//[^\r\n]*", "NEWLINE": r"\r\n?|\n"}.get(name, pattern))
+    for name, pattern in TOKEN_SPECIFICATION
+]
+BYTES_TOKEN_REGEX = re.compile('|'.join(f"(?P<{name}>{pattern})" for name, pattern in BYTES_TOKEN_SPECIFICATION).encode())
+
+# Token type for each lexeme kind that produces a token
+KIND_TYPES = {
+    "IDENTIFIER": TokenType.IDENTIFIER,
+    "INTEGER": TokenType.INTEGER,
+    "STRING": TokenType.STRING,
+    "OPERATOR": TokenType.OPERATOR,
+    "PUNCTUATION": TokenType.PUNCTUATION,
+}
+
 def tokenize(code):
-    tokens = []
-    tok_regex = '|'.join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPECIFICATION)
-    get_token = re.compile(tok_regex).match
+    """Scan code in one pass into tokens carrying 1-based line and column numbers."""
+    return list(tokenize_iter(code))
+
+def source_lines(source):
+    """Lines of a file object, decoded if read as bytes."""
+    readline = source.readline
+    while True:
+        text = readline()
+        if not text:
+            return
+        if type(text) is not str:
+            text = text.decode()
+        yield text
+
+def tokenize_iter(source):
+    """Yield the tokens of source one at a time.
+
+    source is either a string, scanned in place, a bytes buffer or mmap,
+    scanned in place by tokenize_buffer, or a file object read one line at a
+    time so that only the current line (or the lines of an unfinished string
+    literal) is held in memory.
+    """
+    if isinstance(source, (bytes, bytearray, mmap.mmap)):
+        yield from tokenize_buffer(source)
+        return
+    chunks = iter((source,)) if isinstance(source, str) else source_lines(source)
+    finditer = TOKEN_REGEX.finditer
+    kind_types = KIND_TYPES
+    keyword = TokenType.KEYWORD
+    identifier = TokenType.IDENTIFIER
+    string = TokenType.STRING
+    line = 1
+    text = ""
+    line_start = 0
+    for text in chunks:
+        line_start = 0
+        pos = 0
+        while pos is not None:
+            start, pos = pos, None
+            for mo in finditer(text, start):
+                kind = mo.lastgroup
+                token_type = kind_types.get(kind)
+                if token_type is not None:
+                    value = mo.group()
+                    if token_type is identifier and value in KEYWORDS:
+                        token_type = keyword
+                    yield Token(token_type, value, line, mo.start() - line_start + 1)
+                    if token_type is string and "\n" in value:
+                        line += value.count("\n")
+                        line_start = value.rindex("\n") + mo.start() + 1
+                elif kind == "NEWLINE":
+                    line += 1
+                    line_start = mo.end()
+                elif kind == "MISMATCH":
+                    # A quote with no closing quote on its line may start a
+                    # string that ends on a later one: join the next line and
+                    # scan again from the quote
+                    if mo.group() == "'":
+                        more = next(chunks, None)
+                        if more is not None:
+                            quote = mo.start()
+                            text = text[quote:] + more
+                            line_start -= quote
+                            pos = 0
+                            break
+                    raise LexicalError(f"Unexpected character {mo.group()!r} at {line}:{mo.start() - line_start + 1}")
+    yield Token(TokenType.EOF, 'EOF', line, len(text) - line_start + 1)
+
+def tokenize_buffer(buffer):
+    """Yield the tokens of a bytes-like buffer such as an mmap, scanning it in place.
+
+    Only identifier, integer and string lexemes are decoded; keywords,
+    operators and punctuation are looked up as bytes and share one str per
+    lexeme. Columns count bytes. Lines may end in LF, CRLF or a lone CR.
+    """
+    kind_types = KIND_TYPES
+    identifier = TokenType.IDENTIFIER
+    string = TokenType.STRING
+    # Lexemes with a fixed token type, filled in as operators and
+    # punctuation are first seen
+    lexemes = {word.encode(): (TokenType.KEYWORD, word) for word in KEYWORDS}
+    fixed = (TokenType.OPERATOR, TokenType.PUNCTUATION)
     line = 1
-    pos = 0
-    mo = get_token(code)
-    while mo:
+    line_start = 0
+    for mo in BYTES_TOKEN_REGEX.finditer(buffer):
         kind = mo.lastgroup
-        value = mo.group()
-        if kind == "NEWLINE":
+        token_type = kind_types.get(kind)
+        if token_type is not None:
+            raw = mo.group()
+            known = lexemes.get(raw)
+            if known is not None:
+                token_type, value = known
+            else:
+                value = raw.decode()
+                if token_type in fixed:
+                    lexemes[raw] = (token_type, value)
+                elif token_type is string and "\r" in value:
+                    # As universal newlines would have read it
+                    value = value.replace("\r\n", "\n").replace("\r", "\n")
+            yield Token(token_type, value, line, mo.start() - line_start + 1)
+            if token_type is string and "\n" in value:
+                line += value.count("\n")
+                line_start = max(raw.rfind(b"\n"), raw.rfind(b"\r")) + mo.start() + 1
+        elif kind == "NEWLINE":
             line += 1
-        elif kind == "SKIP" or kind == "COMMENT":
-            pass
-        elif kind == "IDENTIFIER" and value in KEYWORDS:
-            tokens.append(Token(TokenType.KEYWORD, value))
-        elif kind == "IDENTIFIER":
-            tokens.append(Token(TokenType.IDENTIFIER, value))
-        elif kind == "INTEGER":
-            tokens.append(Token(TokenType.INTEGER, value))
-        elif kind == "STRING":
-            tokens.append(Token(TokenType.STRING, value))
-        elif kind == "OPERATOR":
-            tokens.append(Token(TokenType.OPERATOR, value))
-        elif kind == "PUNCTUATION":
-            tokens.append(Token(TokenType.PUNCTUATION, value))
+            line_start = mo.end()
         elif kind == "MISMATCH":
-            raise RuntimeError(f"Unexpected character {value!r} on line {line}")
-        pos = mo.end()
-        mo = get_token(code, pos)
-    tokens.append(Token(TokenType.EOF, 'EOF'))
-    return tokens
+            character = mo.group().decode(errors="replace")
+            raise LexicalError(f"Unexpected character {character!r} at {line}:{mo.start() - line_start + 1}")
+    yield Token(TokenType.EOF, 'EOF', line, len(buffer) - line_start + 1)
 
+@contextmanager
+def map_source(file):
+    """Map an open binary file read-only for tokenize_iter.
+
+    An empty file, which cannot be mapped, gives an empty buffer.
+    """
+    if os.fstat(file.fileno()).st_size == 0:
+        yield b""
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        yield buffer
 
 
 if __name__ == "__main__":
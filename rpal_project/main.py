@@ -1,28 +1,34 @@
 import sys
-from lexer.lexical_analyzer import tokenize
+from lexer.lexical_analyzer import LexicalError, tokenize_iter, map_source
 from parser.parser import RPALParser  
+from cse.csemachine import RPALRuntimeError
 from ast.ast import ASTNode 
 #from standardizer.standardizer import standardize_ast, print_st
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python main.py <-ast | -eval> <source_file.rpal>")
+    use_mmap = "--mmap" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--mmap"]
+    if len(args) != 2:
+        print("Usage: python main.py [--mmap] <-ast | -eval> <source_file.rpal>")
         sys.exit(1)
 
-    mode = sys.argv[1]
-    file_path = sys.argv[2]
+    mode = args[0]
+    file_path = args[1]
 
     try:
-        with open(file_path, 'r') as file:
-            source_code = file.read()
+        file = open(file_path, 'rb' if use_mmap else 'r')
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
 
     try:
-        tokens = tokenize(source_code)
-        parser = RPALParser(tokens)
-        ast_root = parser.parse()
+        # Tokens are read from the file as the parser asks for them
+        with file:
+            if use_mmap:
+                with map_source(file) as buffer:
+                    ast_root = RPALParser(tokenize_iter(buffer)).parse()
+            else:
+                ast_root = RPALParser(tokenize_iter(file)).parse()
 
         if mode == "-ast":
             ast_root.print_tree()  # Implement print_tree() in ASTNode to match rpal.exe output
@@ -48,9 +54,15 @@ def main():
             print("Error: Invalid mode. Use -ast or -eval.")
             sys.exit(1)
 
+    except LexicalError as e:
+        print(f"Lexical Error: {e}")
+        sys.exit(1)
     except SyntaxError as e:
         print(f"Syntax Error: {e}")
         sys.exit(1)
+    except RPALRuntimeError as e:
+        print(e)
+        sys.exit(e.exit_code)
 
 if __name__ == "__main__":
     main()
@@ -1,44 +1,158 @@
+import math
 import sys
-from lexer.lexical_analyzer import tokenize
+from lexer.lexical_analyzer import LexicalError, tokenize_iter, map_source
 from parser.parser import RPALParser
-from contextlib import redirect_stdout
+from cse.csemachine import RPALRuntimeError
+from cse import cache
 import os
+
+# Long options, accepted anywhere on the command line
+OPTIONS = ["--mmap", "--no-cache", "--clear-cache", "--batch", "--profile", "--sample", "--watch", "--no-opt"]
+# Long options that take a value, given as --name=value
+VALUE_OPTIONS = ["--jobs", "--timeout", "--profile", "--sample"]
+
+# Value options that must be positive numbers, and the type each is read as
+NUMBER_OPTIONS = {"--jobs": int, "--timeout": float}
+
+def valid_option(option):
+    name, _, value = option.partition("=")
+    if name in NUMBER_OPTIONS:
+        try:
+            number = NUMBER_OPTIONS[name](value)
+        except ValueError:
+            return False
+        return 0 < number < math.inf
+    return (name in OPTIONS and not value) or (name in VALUE_OPTIONS and value != "")
+
+def option_value(options, name, default):
+    for option in options:
+        if option.startswith(name + "="):
+            return option[len(name) + 1:]
+    return default
+
+def parse_file(file, use_mmap):
+    """Parse an open source file, reading tokens as the parser asks for them"""
+    with file:
+        if use_mmap:
+            with map_source(file) as buffer:
+                return RPALParser(tokenize_iter(buffer)).parse()
+        return RPALParser(tokenize_iter(file)).parse()
+
+def evaluate(file, file_path, mode, use_cache, use_mmap, optimize=True):
+    """Evaluate an open source file and return the result to print.
+
+    -vm evaluates on the bytecode backend, any other mode on the CSE machine.
+    With use_cache, a program compiled by an earlier run is not parsed at all.
+    With optimize, constants are folded in the standardized tree first.
+    """
+    from standardizer.standardizer import standardize
+    from standardizer import optimizer
+    from cse.csemachine import CSEMachine
+    from cse.bytecode import BytecodeMachine
+
+    controlStruc = None
+    if use_cache:
+        key = cache.source_key(file_path, "" if optimize else "no-opt")
+        controlStruc = cache.load(file_path, key)
+
+    machine = BytecodeMachine() if mode == "-vm" else CSEMachine()
+    if controlStruc is None:
+        standardized_ast = standardize(parse_file(file, use_mmap))
+        if optimize:
+            optimizer.optimize(standardized_ast)
+        machine.buildControlStructure(standardized_ast, 0)
+        if use_cache:
+            cache.save(file_path, key, machine.controlStruc)
+    else:
+        file.close()
+        machine.load(controlStruc)
+    return machine.evaluate()
+
 def main():
-    if len(sys.argv) not in [2, 3]:
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) not in [1, 2] or not all(valid_option(option) for option in options):
         print("Usage:")
         print("  python myrpal.py -ast <source_file.rpal>")
         print("  python myrpal.py -st <source_file.rpal>")
+        print("  python myrpal.py -vm <source_file.rpal>")
         print("  python myrpal.py <source_file.rpal>")
+        print("  python myrpal.py --batch [-vm] <directory>")
+        print("  python myrpal.py --watch [-vm] <source_file.rpal>")
+        print("Options:")
+        print("  --mmap          scan a memory-mapped source file instead of reading it")
+        print("  --no-cache      compile the program even if it is cached, and do not cache it")
+        print("  --no-opt        do not fold constants or prune constant conditionals")
+        print("  --clear-cache   remove the compiled programs cached next to the source file")
+        print("  --batch         evaluate every .rpal file in a directory on a process pool")
+        print("  --jobs=N        worker processes for --batch (default: one per CPU)")
+        print("  --timeout=S     seconds each --batch program may run (default: 10)")
+        print("  --profile       report phase timings and CSE counters on stderr")
+        print("  --profile=FILE  write that report to FILE as JSON instead")
+        print("  --sample        profile the RPAL functions by sampling: flat profile on stderr,")
+        print("                  collapsed stacks in outputs/samples_<name>.folded")
+        print("  --sample=FILE   write the collapsed stacks to FILE instead")
+        print("  --watch         evaluate again whenever the file changes, re-parsing only")
+        print("                  the top-level definitions that were edited")
         sys.exit(1)
+    use_mmap = "--mmap" in options
+    optimize = "--no-opt" not in options
 
     # Handle input mode
-    if len(sys.argv) == 3:
-        mode = sys.argv[1]
-        file_path = sys.argv[2]
+    if len(args) == 2:
+        mode = args[0]
+        file_path = args[1]
         #if mode != "-ast":
             #print("Error: Invalid mode. Use '-ast' or no switch.")
-        if mode not in ["-ast", "-st"]:
-            print("Error: Invalid mode. Use '-ast', '-st', or no switch.")
+        if mode not in ["-ast", "-st", "-vm"]:
+            print("Error: Invalid mode. Use '-ast', '-st', '-vm', or no switch.")
             sys.exit(1)
     else:
         mode = "eval"
-        file_path = sys.argv[1]
+        file_path = args[0]
+
+    profile = any(option.partition("=")[0] == "--profile" for option in options)
+    sample = any(option.partition("=")[0] == "--sample" for option in options)
+    # Evaluation can start from the control structures of an earlier run
+    use_cache = mode in ["eval", "-vm"] and "--no-cache" not in options
+
+    if "--batch" in options:
+        from batch import run_batch
+
+        if mode not in ["eval", "-vm"]:
+            print("Error: --batch evaluates programs; use no switch or '-vm'.")
+            sys.exit(1)
+        if not os.path.isdir(file_path):
+            print(f"Error: Directory '{file_path}' not found.")
+            sys.exit(1)
+        if "--clear-cache" in options:
+            cache.clear_directory(file_path)
+        jobs = int(option_value(options, "--jobs", 0)) or None
+        timeout = float(option_value(options, "--timeout", 10))
+        sys.exit(run_batch(file_path, mode, use_cache, use_mmap, jobs, timeout, optimize))
+
+    if "--watch" in options:
+        from watch import watch
+
+        if mode not in ["eval", "-vm"]:
+            print("Error: --watch evaluates programs; use no switch or '-vm'.")
+            sys.exit(1)
+        sys.exit(watch(file_path, mode, optimize))
 
     # Load file
     try:
-        with open(file_path, 'r') as file:
-            source_code = file.read()
+        file = open(file_path, 'rb' if use_mmap else 'r')
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
 
+    if "--clear-cache" in options:
+        cache.clear(file_path)
+
     # Tokenize and parse
     try:
-        tokens = tokenize(source_code)
-        parser = RPALParser(tokens)
-        ast_root = parser.parse()
-
         if mode == "-ast":
+            ast_root = parse_file(file, use_mmap)
             
             # Create 'outputs/' directory if it doesn't exist
             os.makedirs("outputs", exist_ok=True)
@@ -47,13 +161,10 @@ def main():
             base_filename = os.path.basename(file_path).replace(".rpal", "")
             output_path = f"outputs/ast_{base_filename}.txt"
 
-            ast_root.print_tree()  # AST printing
-
-            # Write AST to file
+            # Print the AST and write it to the file in one pass
             with open(output_path, "w") as f:
-                with redirect_stdout(f):
-                   ast_root.print_tree()
-               
+                ast_root.write_tree(sys.stdout, f)
+
 
             print(f"[✔] AST written to {output_path}")
         elif mode == "-st":
@@ -67,23 +178,41 @@ def main():
             output_path = f"outputs/st_{base_filename}.txt"
     
             # Standardize the AST
-            standardized_ast = standardize(ast_root)
+            standardized_ast = standardize(parse_file(file, use_mmap))
             standardized_ast.print_tree()  # Print standardized tree to console
     
             
     
     
-        else:
-            from standardizer.standardizer import standardize
-            from cse.csemachine import Result
+        elif sample:
+            from profiling import sample_program
+
+            # Create 'outputs/' directory if it doesn't exist
+            os.makedirs("outputs", exist_ok=True)
+            base_filename = os.path.basename(file_path).replace(".rpal", "")
+            collapsed_path = option_value(options, "--sample", f"outputs/samples_{base_filename}.folded")
+
+            result = sample_program(file, file_path, use_mmap, collapsed_path, optimize)
+            print(result)
+        elif profile:
+            from profiling import profile_program
 
-            standardized_ast = standardize(ast_root)
-            result = Result(standardized_ast)
+            result, report = profile_program(file, file_path, mode, use_mmap, optimize=optimize)
+            print(result)
+            report.write(option_value(options, "--profile", None))
+        else:
+            result = evaluate(file, file_path, mode, use_cache, use_mmap, optimize)
             print(result)  # Output should be just the final value, e.g., 15
 
+    except LexicalError as e:
+        print(f"Lexical Error: {e}")
+        sys.exit(1)
     except SyntaxError as e:
         print(f"Syntax Error: {e}")
         sys.exit(1)
+    except RPALRuntimeError as e:
+        print(e)
+        sys.exit(e.exit_code)
 
 if __name__ == "__main__":
     main()
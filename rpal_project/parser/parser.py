@@ -1,22 +1,70 @@
 from lexer.lexical_analyzer import TokenType, Token, tokenize
-from ast.ast import ASTNode
+import sys
+from ast.ast import ASTNode, NodeKind
+
+LEFT, RIGHT, NONE = 0, 1, 2
+AT_PRECEDENCE = 8
+
+# Binary operators of the B and A layers by token text: (precedence,
+# associativity, node kind). Keywords are reserved and strings keep their
+# quotes, so the text alone identifies an operator. Comparisons are
+# non-associative: Bp allows one between two A's.
+BINARY_OPERATORS = {
+    'or': (1, LEFT, NodeKind.OR),
+    '&': (2, LEFT, NodeKind.AMP),
+    'gr': (4, NONE, NodeKind.GR),
+    '>': (4, NONE, NodeKind.GR),
+    'ge': (4, NONE, NodeKind.GE),
+    '>=': (4, NONE, NodeKind.GE),
+    'ls': (4, NONE, NodeKind.LS),
+    '<': (4, NONE, NodeKind.LS),
+    'le': (4, NONE, NodeKind.LE),
+    '<=': (4, NONE, NodeKind.LE),
+    'eq': (4, NONE, NodeKind.EQ),
+    'ne': (4, NONE, NodeKind.NE),
+    '+': (5, LEFT, NodeKind.PLUS),
+    '-': (5, LEFT, NodeKind.MINUS),
+    '*': (6, LEFT, NodeKind.MULTIPLY),
+    '/': (6, LEFT, NodeKind.DIVIDE),
+    '**': (7, RIGHT, NodeKind.POWER),
+    '@': (AT_PRECEDENCE, LEFT, NodeKind.AT),
+}
+
+# Prefix operators: (precedence, node kind). Unary plus adds no node.
+PREFIX_OPERATORS = {
+    'not': (3, NodeKind.NOT),
+    '-': (5, NodeKind.NEG),
+    '+': (5, None),
+}
+
+# Tokens that start a rand in R, besides identifiers, integers and strings
+RAND_VALUES = frozenset(('true', 'false', 'nil', 'dummy', '('))
+
 
 class RPALParser:
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.current_token_index = 0
-        self.current_token = tokens[0]
+        # tokens may be a list or a lazy stream such as tokenize_iter; only
+        # the current token is held, as the grammar never needs to backtrack
+        self.tokens = iter(tokens)
+        self.current_token = next(self.tokens)
     
     def parse(self):
         """Parse the RPAL program and return the AST"""
-        return self.parse_E()
+        e_node = self.parse_E()
+        # Tokens are read lazily, so only reading to the end reports trailing
+        # text and any lexical error in it
+        self.match(TokenType.EOF)
+        return e_node
     
     def consume(self):
         """Consume current token and advance to the next token"""
-        if self.current_token_index < len(self.tokens) - 1:
-            self.current_token_index += 1
-            self.current_token = self.tokens[self.current_token_index]
+        # The stream ends with EOF, which stays current once reached
+        self.current_token = next(self.tokens, self.current_token)
     
+    def identifier(self, token):
+        """ID node for an identifier token, with the name interned"""
+        return ASTNode(NodeKind.ID, sys.intern(token.value))
+
     def match(self, token_type, value=None):
         """Match current token with expected token type and value"""
         if self.current_token.type == token_type and (value is None or self.current_token.value == value):
@@ -29,7 +77,14 @@ class RPALParser:
             else:
                 expected = token_type.name
             found = f"{self.current_token.type.name}: {self.current_token.value}"
-            raise SyntaxError(f"Expected {expected}, but found {found}")
+            raise self.error(f"Expected {expected}, but found {found}")
+
+    def error(self, message):
+        """SyntaxError for message, at the line:column of the current token"""
+        token = self.current_token
+        if token.line is not None:
+            message = f"{message} at {token.line}:{token.column}"
+        return SyntaxError(message)
     
     def check(self, token_type, value=None):
         """Check if current token matches expected token type and value without consuming it"""
@@ -39,17 +94,27 @@ class RPALParser:
     # Expressions
     def parse_E(self):
         """Parse E production"""
-        if self.check(TokenType.KEYWORD, 'let'):
-            self.match(TokenType.KEYWORD, 'let')
+        # A chain of 'let D in let D in ...' is read in a loop rather than by
+        # recursion, so long chains of definitions cannot exceed the recursion limit.
+        let_nodes = []
+        while self.check(TokenType.KEYWORD, 'let'):
+            let_token = self.match(TokenType.KEYWORD, 'let')
             d_node = self.parse_D()
             self.match(TokenType.KEYWORD, 'in')
-            e_node = self.parse_E()
-            let_node = ASTNode('let')
+            let_node = ASTNode(NodeKind.LET, line=let_token.line)
             let_node.add_child(d_node)
+            let_nodes.append(let_node)
+
+        e_node = self.parse_E_body()
+        for let_node in reversed(let_nodes):
             let_node.add_child(e_node)
-            return let_node
-        elif self.check(TokenType.KEYWORD, 'fn'):
-            self.match(TokenType.KEYWORD, 'fn')
+            e_node = let_node
+        return e_node
+
+    def parse_E_body(self):
+        """Parse the non-let alternatives of the E production"""
+        if self.check(TokenType.KEYWORD, 'fn'):
+            fn_token = self.match(TokenType.KEYWORD, 'fn')
             vb_nodes = []
             while True:
                 vb_nodes.append(self.parse_Vb())
@@ -58,13 +123,13 @@ class RPALParser:
             self.match(TokenType.PUNCTUATION, '.')
             e_node = self.parse_E()
             
-            lambda_node = ASTNode('lambda')
+            lambda_node = ASTNode(NodeKind.LAMBDA, line=fn_token.line)
             # Build nested lambda structure for multiple variables
             current_node = lambda_node
             for i, vb_node in enumerate(vb_nodes):
                 current_node.add_child(vb_node)
                 if i < len(vb_nodes) - 1:
-                    next_lambda = ASTNode('lambda')
+                    next_lambda = ASTNode(NodeKind.LAMBDA, line=fn_token.line)
                     current_node.add_child(next_lambda)
                     current_node = next_lambda
                 else:
@@ -78,9 +143,9 @@ class RPALParser:
         """Parse Ew production"""
         t_node = self.parse_T()
         if self.check(TokenType.KEYWORD, 'where'):
-            self.match(TokenType.KEYWORD, 'where')
+            where_token = self.match(TokenType.KEYWORD, 'where')
             dr_node = self.parse_Dr()
-            where_node = ASTNode('where')
+            where_node = ASTNode(NodeKind.WHERE, line=where_token.line)
             where_node.add_child(t_node)
             where_node.add_child(dr_node)
             return where_node
@@ -96,7 +161,7 @@ class RPALParser:
             ta_nodes.append(self.parse_Ta())
         
         if len(ta_nodes) > 1:
-            tau_node = ASTNode('tau')
+            tau_node = ASTNode(NodeKind.TAU)
             for node in ta_nodes:
                 tau_node.add_child(node)
             return tau_node
@@ -108,7 +173,7 @@ class RPALParser:
         
         while self.check(TokenType.KEYWORD, 'aug'):
             self.match(TokenType.KEYWORD, 'aug')
-            aug_node = ASTNode('aug')
+            aug_node = ASTNode(NodeKind.AUG)
             aug_node.add_child(tc_node)
             aug_node.add_child(self.parse_Tc())
             tc_node = aug_node
@@ -124,7 +189,7 @@ class RPALParser:
             tc1_node = self.parse_Tc()
             self.match(TokenType.OPERATOR, '|')
             tc2_node = self.parse_Tc()
-            arrow_node = ASTNode('->')
+            arrow_node = ASTNode(NodeKind.COND)
             arrow_node.add_child(b_node)
             arrow_node.add_child(tc1_node)
             arrow_node.add_child(tc2_node)
@@ -132,188 +197,62 @@ class RPALParser:
         
         return b_node
     
-    # Boolean Expressions
+    # Boolean And Arithmetic Expressions
     def parse_B(self):
-        """Parse B production"""
-        bt_node = self.parse_Bt()
-        
-        while self.check(TokenType.KEYWORD, 'or'):
-            self.match(TokenType.KEYWORD, 'or')
-            or_node = ASTNode('or')
-            or_node.add_child(bt_node)
-            or_node.add_child(self.parse_Bt())
-            bt_node = or_node
-        
-        return bt_node
-    
-    def parse_Bt(self):
-        """Parse Bt production"""
-        bs_node = self.parse_Bs()
-        
-        while self.check(TokenType.OPERATOR, '&'):
-            self.match(TokenType.OPERATOR, '&')
-            and_node = ASTNode('&')
-            and_node.add_child(bs_node)
-            and_node.add_child(self.parse_Bs())
-            bs_node = and_node
-        
-        return bs_node
-    
-    def parse_Bs(self):
-        """Parse Bs production"""
-        if self.check(TokenType.KEYWORD, 'not'):
-            self.match(TokenType.KEYWORD, 'not')
-            not_node = ASTNode('not')
-            not_node.add_child(self.parse_Bp())
-            return not_node
-        
-        return self.parse_Bp()
-    
-    def parse_Bp(self):
-        """Parse Bp production"""
-        a_node = self.parse_A()
-        
-        if self.check(TokenType.KEYWORD, 'gr') or self.check(TokenType.OPERATOR, '>'):
-            if self.check(TokenType.KEYWORD, 'gr'):
-                self.match(TokenType.KEYWORD, 'gr')
-            else:
-                self.match(TokenType.OPERATOR, '>')
-            gr_node = ASTNode('gr')
-            gr_node.add_child(a_node)
-            gr_node.add_child(self.parse_A())
-            return gr_node
-        
-        elif self.check(TokenType.KEYWORD, 'ge') or self.check(TokenType.OPERATOR, '>='):
-            if self.check(TokenType.KEYWORD, 'ge'):
-                self.match(TokenType.KEYWORD, 'ge')
-            else:
-                self.match(TokenType.OPERATOR, '>=')
-            ge_node = ASTNode('ge')
-            ge_node.add_child(a_node)
-            ge_node.add_child(self.parse_A())
-            return ge_node
-        
-        elif self.check(TokenType.KEYWORD, 'ls') or self.check(TokenType.OPERATOR, '<'):
-            if self.check(TokenType.KEYWORD, 'ls'):
-                self.match(TokenType.KEYWORD, 'ls')
-            else:
-                self.match(TokenType.OPERATOR, '<')
-            ls_node = ASTNode('ls')
-            ls_node.add_child(a_node)
-            ls_node.add_child(self.parse_A())
-            return ls_node
-        
-        elif self.check(TokenType.KEYWORD, 'le') or self.check(TokenType.OPERATOR, '<='):
-            if self.check(TokenType.KEYWORD, 'le'):
-                self.match(TokenType.KEYWORD, 'le')
-            else:
-                self.match(TokenType.OPERATOR, '<=')
-            le_node = ASTNode('le')
-            le_node.add_child(a_node)
-            le_node.add_child(self.parse_A())
-            return le_node
-        
-        elif self.check(TokenType.KEYWORD, 'eq'):
-            self.match(TokenType.KEYWORD, 'eq')
-            eq_node = ASTNode('eq')
-            eq_node.add_child(a_node)
-            eq_node.add_child(self.parse_A())
-            return eq_node
-        
-        elif self.check(TokenType.KEYWORD, 'ne'):
-            self.match(TokenType.KEYWORD, 'ne')
-            ne_node = ASTNode('ne')
-            ne_node.add_child(a_node)
-            ne_node.add_child(self.parse_A())
-            return ne_node
-        
-        return a_node
-    
-    # Arithmetic Expressions
-    def parse_A(self):
-        """Parse A production"""
-        if self.check(TokenType.OPERATOR, '+'):
-            self.match(TokenType.OPERATOR, '+')
-            return self.parse_At()
-        
-        elif self.check(TokenType.OPERATOR, '-'):
-            self.match(TokenType.OPERATOR, '-')
-            neg_node = ASTNode('neg')
-            neg_node.add_child(self.parse_At())
-            return neg_node
-        
-        at_node = self.parse_At()
-        
-        while self.check(TokenType.OPERATOR, '+') or self.check(TokenType.OPERATOR, '-'):
-            op = self.current_token.value
+        """Parse B production, with Bt, Bs, Bp, A, At, Af and Ap below it"""
+        return self.parse_operators(1)
+
+    def parse_operators(self, min_precedence):
+        """Parse operators of at least min_precedence by precedence climbing.
+
+        limit is the highest precedence that may still follow the left operand.
+        It drops after a prefix operator or a comparison, where the grammar
+        allows only lower layers to continue, and after each right operand,
+        which has already taken every operator it could.
+        """
+        token = self.current_token
+        prefix = PREFIX_OPERATORS.get(token.value)
+        if prefix is not None and prefix[0] >= min_precedence:
+            precedence, kind = prefix
             self.consume()
-            op_node = ASTNode(op)
-            op_node.add_child(at_node)
-            op_node.add_child(self.parse_At())
-            at_node = op_node
-        
-        return at_node
-    
-    def parse_At(self):
-        """Parse At production"""
-        af_node = self.parse_Af()
-        
-        while self.check(TokenType.OPERATOR, '*') or self.check(TokenType.OPERATOR, '/'):
-            op = self.current_token.value
+            left = self.parse_operators(precedence + 1)
+            if kind is not None:
+                left = ASTNode(kind, children=[left])
+            limit = precedence - 1
+        else:
+            left = self.parse_R()
+            limit = AT_PRECEDENCE
+
+        while True:
+            token = self.current_token
+            operator = BINARY_OPERATORS.get(token.value)
+            if operator is None:
+                return left
+            precedence, associativity, kind = operator
+            if precedence < min_precedence or precedence > limit:
+                return left
             self.consume()
-            op_node = ASTNode(op)
-            op_node.add_child(af_node)
-            op_node.add_child(self.parse_Af())
-            af_node = op_node
-        
-        return af_node
-    
-    def parse_Af(self):
-        """Parse Af production"""
-        ap_node = self.parse_Ap()
-        
-        if self.check(TokenType.OPERATOR, '**'):
-            self.match(TokenType.OPERATOR, '**')
-            exp_node = ASTNode('**')
-            exp_node.add_child(ap_node)
-            exp_node.add_child(self.parse_Af())
-            return exp_node
-        
-        return ap_node
-    
-    def parse_Ap(self):
-        """Parse Ap production"""
-        r_node = self.parse_R()
-        
-        while self.check(TokenType.OPERATOR, '@'):
-            self.match(TokenType.OPERATOR, '@')
-            if not self.check(TokenType.IDENTIFIER):
-                raise SyntaxError(f"Expected IDENTIFIER after '@', but found {self.current_token.type.name}: {self.current_token.value}")
-            id_token = self.match(TokenType.IDENTIFIER)
-            at_node = ASTNode('@')
-            at_node.add_child(r_node)
-            id_node = ASTNode(type_name=f"<ID:{id_token.value}>",value=id_token.value)
-            at_node.add_child(id_node)
-            next_r_node = self.parse_R()
-            at_node.add_child(next_r_node)
-            r_node = at_node
-        
-        return r_node
+
+            if kind == NodeKind.AT:
+                if not self.check(TokenType.IDENTIFIER):
+                    raise self.error(f"Expected IDENTIFIER after '@', but found {self.current_token.type.name}: {self.current_token.value}")
+                id_node = self.identifier(self.match(TokenType.IDENTIFIER))
+                left = ASTNode(kind, children=[left, id_node, self.parse_R()])
+            elif associativity == RIGHT:
+                left = ASTNode(kind, children=[left, self.parse_operators(precedence)])
+                limit = min(limit, precedence - 1)
+            else:
+                left = ASTNode(kind, children=[left, self.parse_operators(precedence + 1)])
+                limit = min(limit, precedence if associativity == LEFT else precedence - 1)
     
     # Rators And Rands
     def parse_R(self):
         """Parse R production"""
         rn_node = self.parse_Rn()
         
-        while (self.check(TokenType.IDENTIFIER) or 
-               self.check(TokenType.INTEGER) or 
-               self.check(TokenType.STRING) or 
-               self.check(TokenType.KEYWORD, 'true') or 
-               self.check(TokenType.KEYWORD, 'false') or 
-               self.check(TokenType.KEYWORD, 'nil') or 
-               self.check(TokenType.KEYWORD, 'dummy') or 
-               self.check(TokenType.PUNCTUATION, '(')):
-            gamma_node = ASTNode('gamma')
+        while (self.current_token.type in (TokenType.IDENTIFIER, TokenType.INTEGER, TokenType.STRING)
+               or self.current_token.value in RAND_VALUES):
+            gamma_node = ASTNode(NodeKind.GAMMA)
             gamma_node.add_child(rn_node)
             gamma_node.add_child(self.parse_Rn())
             rn_node = gamma_node
@@ -324,33 +263,33 @@ class RPALParser:
         """Parse Rn production"""
         if self.check(TokenType.IDENTIFIER):
             id_token = self.match(TokenType.IDENTIFIER)
-            return ASTNode(type_name=f"<ID:{id_token.value}>", value= id_token.value)
+            return self.identifier(id_token)
         
         elif self.check(TokenType.INTEGER):
             int_token = self.match(TokenType.INTEGER)
-            return ASTNode(type_name=f"<INT:{int_token.value}>",value= int_token.value)
+            return ASTNode(NodeKind.INT, int_token.value)
         
         elif self.check(TokenType.STRING):
             str_token = self.match(TokenType.STRING)
             # Remove the surrounding quotes from string literal
             string_value = str_token.value[1:-1]
-            return ASTNode(type_name=f'<STR:{string_value}>',value=string_value)
+            return ASTNode(NodeKind.STR, string_value)
         
         elif self.check(TokenType.KEYWORD, 'true'):
             self.match(TokenType.KEYWORD, 'true')
-            return ASTNode('<true>')
+            return ASTNode(NodeKind.TRUE)
         
         elif self.check(TokenType.KEYWORD, 'false'):
             self.match(TokenType.KEYWORD, 'false')
-            return ASTNode('<false>')
+            return ASTNode(NodeKind.FALSE)
         
         elif self.check(TokenType.KEYWORD, 'nil'):
             self.match(TokenType.KEYWORD, 'nil')
-            return ASTNode('<nil>')
+            return ASTNode(NodeKind.NIL)
         
         elif self.check(TokenType.KEYWORD, 'dummy'):
             self.match(TokenType.KEYWORD, 'dummy')
-            return ASTNode('<dummy>')
+            return ASTNode(NodeKind.DUMMY)
         
         elif self.check(TokenType.PUNCTUATION, '('):
             self.match(TokenType.PUNCTUATION, '(')
@@ -359,7 +298,7 @@ class RPALParser:
             return e_node
         
         else:
-            raise SyntaxError(f"Unexpected token in Rn: {self.current_token.type.name}: {self.current_token.value}")
+            raise self.error(f"Unexpected token in Rn: {self.current_token.type.name}: {self.current_token.value}")
     
     # Definitions
     def parse_D(self):
@@ -367,9 +306,9 @@ class RPALParser:
         da_node = self.parse_Da()
         
         if self.check(TokenType.KEYWORD, 'within'):
-            self.match(TokenType.KEYWORD, 'within')
+            within_token = self.match(TokenType.KEYWORD, 'within')
             d_node = self.parse_D()
-            within_node = ASTNode('within')
+            within_node = ASTNode(NodeKind.WITHIN, line=within_token.line)
             within_node.add_child(da_node)
             within_node.add_child(d_node)
             return within_node
@@ -385,7 +324,7 @@ class RPALParser:
             dr_nodes.append(self.parse_Dr())
         
         if len(dr_nodes) > 1:
-            and_node = ASTNode('and')
+            and_node = ASTNode(NodeKind.AND)
             for node in dr_nodes:
                 and_node.add_child(node)
             return and_node
@@ -395,9 +334,9 @@ class RPALParser:
     def parse_Dr(self):
         """Parse Dr production"""
         if self.check(TokenType.KEYWORD, 'rec'):
-            self.match(TokenType.KEYWORD, 'rec')
+            rec_token = self.match(TokenType.KEYWORD, 'rec')
             db_node = self.parse_Db()
-            rec_node = ASTNode('rec')
+            rec_node = ASTNode(NodeKind.REC, line=rec_token.line)
             rec_node.add_child(db_node)
             return rec_node
         
@@ -406,46 +345,33 @@ class RPALParser:
     def parse_Db(self):
         """Parse Db production"""
         if self.check(TokenType.IDENTIFIER):
-            # Check if this is a function definition (fcn_form)
-            saved_index = self.current_token_index
+            # The token after the first identifier decides the form: a ',' or
+            # '=' continues a Vl, anything that starts a Vb is a fcn_form
             id_token = self.match(TokenType.IDENTIFIER)
-            
-            # Collect variable bindings if any
-            vb_nodes = []
-            while self.check(TokenType.IDENTIFIER) or self.check(TokenType.PUNCTUATION, '('):
-                vb_nodes.append(self.parse_Vb())
-            
-            if self.check(TokenType.OPERATOR, '=') and vb_nodes:
-                # This is a function definition
+            if self.check(TokenType.IDENTIFIER) or self.check(TokenType.PUNCTUATION, '('):
+                fcn_node = ASTNode(NodeKind.FCN_FORM, line=id_token.line)
+                fcn_node.add_child(self.identifier(id_token))
+                while self.check(TokenType.IDENTIFIER) or self.check(TokenType.PUNCTUATION, '('):
+                    fcn_node.add_child(self.parse_Vb())
                 self.match(TokenType.OPERATOR, '=')
-                e_node = self.parse_E()
-                
-                fcn_node = ASTNode('fcn_form')
-                id_node = ASTNode(type_name=f"<ID:{id_token.value}>",value=id_token.value)
-                fcn_node.add_child(id_node)
-                
-                for vb_node in vb_nodes:
-                    fcn_node.add_child(vb_node)
-                
-                fcn_node.add_child(e_node)
+                fcn_node.add_child(self.parse_E())
                 return fcn_node
-            else:
-                # Reset and try as a regular variable binding
-                self.current_token_index = saved_index
-                self.current_token = self.tokens[self.current_token_index]
+            vl_node = self.parse_Vl(id_token)
         
-        if self.check(TokenType.PUNCTUATION, '('):
+        elif self.check(TokenType.PUNCTUATION, '('):
             self.match(TokenType.PUNCTUATION, '(')
             d_node = self.parse_D()
             self.match(TokenType.PUNCTUATION, ')')
             return d_node
         
+        else:
+            vl_node = self.parse_Vl()
+        
         # Regular variable binding
-        vl_node = self.parse_Vl()
         self.match(TokenType.OPERATOR, '=')
         e_node = self.parse_E()
         
-        eq_node = ASTNode('=')
+        eq_node = ASTNode(NodeKind.EQUAL)
         eq_node.add_child(vl_node)
         eq_node.add_child(e_node)
         return eq_node
@@ -455,28 +381,28 @@ class RPALParser:
         """Parse Vb production"""
         if self.check(TokenType.IDENTIFIER):
             id_token = self.match(TokenType.IDENTIFIER)
-            return ASTNode(type_name=f"<ID:{id_token.value}>",value=id_token.value)
+            return self.identifier(id_token)
         
         elif self.check(TokenType.PUNCTUATION, '('):
             self.match(TokenType.PUNCTUATION, '(')
             if self.check(TokenType.PUNCTUATION, ')'):
                 self.match(TokenType.PUNCTUATION, ')')
-                return ASTNode('()')
+                return ASTNode(NodeKind.EMPTY)
             
             vl_node = self.parse_Vl()
             self.match(TokenType.PUNCTUATION, ')')
             return vl_node
         
         else:
-            raise SyntaxError(f"Unexpected token in Vb: {self.current_token.type.name}: {self.current_token.value}")
+            raise self.error(f"Unexpected token in Vb: {self.current_token.type.name}: {self.current_token.value}")
     
-    def parse_Vl(self):
-        """Parse Vl production"""
-        if not self.check(TokenType.IDENTIFIER):
-            raise SyntaxError(f"Expected IDENTIFIER in Vl, but found {self.current_token.type.name}: {self.current_token.value}")
-        
-        id_token = self.match(TokenType.IDENTIFIER)
-        id_node = ASTNode(type_name=f"<ID:{id_token.value}>",value=id_token.value)
+    def parse_Vl(self, id_token=None):
+        """Parse Vl production, or its rest when the first identifier is given"""
+        if id_token is None:
+            if not self.check(TokenType.IDENTIFIER):
+                raise self.error(f"Expected IDENTIFIER in Vl, but found {self.current_token.type.name}: {self.current_token.value}")
+            id_token = self.match(TokenType.IDENTIFIER)
+        id_node = self.identifier(id_token)
         
         if self.check(TokenType.PUNCTUATION, ','):
             id_nodes = [id_node]
@@ -484,11 +410,11 @@ class RPALParser:
             while self.check(TokenType.PUNCTUATION, ','):
                 self.match(TokenType.PUNCTUATION, ',')
                 if not self.check(TokenType.IDENTIFIER):
-                    raise SyntaxError(f"Expected IDENTIFIER after ',', but found {self.current_token.type.name}: {self.current_token.value}")
+                    raise self.error(f"Expected IDENTIFIER after ',', but found {self.current_token.type.name}: {self.current_token.value}")
                 next_id_token = self.match(TokenType.IDENTIFIER)
-                id_nodes.append(ASTNode(f"<ID:{next_id_token.value}>"))
+                id_nodes.append(self.identifier(next_id_token))
             
-            comma_node = ASTNode(',')
+            comma_node = ASTNode(NodeKind.COMMA)
             for node in id_nodes:
                 comma_node.add_child(node)
             return comma_node
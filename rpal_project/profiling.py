@@ -0,0 +1,364 @@
+"""Phase timings, CSE machine counters and RPAL-level sampling for myrpal.py.
+
+profile_program (--profile) runs the whole pipeline one phase at a time. For
+the CSE machine it uses ProfilingMachine, a CSEMachine that counts every
+rule fired and tracks stack depths and environments. sample_program
+(--sample) runs SamplingMachine, which charges steps and timer samples to
+the RPAL lambdas being evaluated. The normal machine is untouched, so a run
+without these options pays nothing for any of this.
+"""
+import json
+import signal
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from lexer.lexical_analyzer import tokenize, tokenize_iter, map_source
+from parser.parser import RPALParser
+from standardizer.standardizer import standardize
+from standardizer.optimizer import Optimizer
+from cse.csemachine import CSEMachine
+from cse.bytecode import BytecodeMachine
+from cse.data_structures import *
+
+# The 13 CSE rules, by number
+RULE_NAMES = {
+    1: "stack a name",
+    2: "stack a lambda",
+    3: "apply a built-in",
+    4: "apply a lambda",
+    5: "exit an environment",
+    6: "binary operator",
+    7: "unary operator",
+    8: "conditional",
+    9: "form a tuple",
+    10: "select from a tuple",
+    11: "apply an n-ary lambda",
+    12: "apply Y*",
+    13: "apply a fixed point",
+}
+
+
+class ProfilingMachine(CSEMachine):
+    """CSEMachine that counts rules and tracks stack depths and environments."""
+
+    def __init__(self):
+        self.rules = [0] * 14 #Times each rule fired, indexed by rule number
+        self.peakControl = 0
+        self.peakStack = 0
+        self.peakFrames = 0
+        self.largestEnvironment = 0
+        super().__init__()
+
+    def counting(self, handler, rule):
+        rules = self.rules
+
+        def counted(*args):
+            rules[rule] += 1
+            handler(*args)
+        return counted
+
+    def ruleHandlers(self):
+        handlers = super().ruleHandlers()
+        for opcode, rule in [(OP_CONSTANT, 1), (OP_IDENTIFIER, 1), (OP_LAMBDA, 2), (OP_ENV_MARKER, 5),
+                             (OP_BINARY, 6), (OP_UNARY, 7), (OP_BETA, 8), (OP_TAU, 9)]:
+            handlers[opcode] = self.counting(handlers[opcode], rule)
+        return handlers
+
+    def gammaRuleTable(self):
+        rules = super().gammaRuleTable()
+        rules[Tuple] = self.counting(rules[Tuple], 10)
+        rules[YStar] = self.counting(rules[YStar], 13)
+        return rules
+
+    def applyLambda(self, stack_latter_1, stack_latter_2):
+        self.rules[11 if "," in stack_latter_1.boundedVar else 4] += 1
+        super().applyLambda(stack_latter_1, stack_latter_2)
+
+    def applyNamed(self, stack_latter_1, stack_latter_2):
+        self.rules[12 if stack_latter_1 == "Y*" else 3] += 1
+        super().applyNamed(stack_latter_1, stack_latter_2)
+
+    def bindEnvironment(self, closure, argument):
+        child = super().bindEnvironment(closure, argument)
+        self.largestEnvironment = max(self.largestEnvironment, len(child.variables))
+        return child
+
+    # ApplyRules with the depths checked after every step
+    def ApplyRules(self):
+        control = self.control
+        stack = self.stack.stack
+        envStack = self.envStack
+        pop = control.pop
+        handlers = self.handlers
+
+        steps = 0
+        peak_control = peak_stack = peak_frames = 0
+        while control:
+            latter = pop()
+            steps += 1
+            handlers[latter.opcode](latter)
+            if len(control) > peak_control:
+                peak_control = len(control)
+            if len(stack) > peak_stack:
+                peak_stack = len(stack)
+            if len(envStack) > peak_frames:
+                peak_frames = len(envStack)
+        self.steps = steps
+        self.peakControl = peak_control
+        self.peakStack = peak_stack
+        self.peakFrames = peak_frames
+
+        self.formatResult()
+
+
+class Profile:
+    """Wall time per phase and named counters, in the order they were recorded."""
+
+    def __init__(self, file_path, mode):
+        self.file_path = file_path
+        self.mode = mode
+        self.phases = {}
+        self.counts = {}
+        self.cse = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def as_dict(self):
+        return {
+            "program": self.file_path,
+            "mode": self.mode,
+            "phases": self.phases,
+            "total": sum(self.phases.values()),
+            "counts": self.counts,
+            "cse": self.cse,
+        }
+
+    def write(self, path=None):
+        """Write the profile as JSON to path, or as a table to stderr."""
+        if path:
+            with open(path, "w") as file:
+                json.dump(self.as_dict(), file, indent=2)
+                file.write("\n")
+            return
+
+        out = sys.stderr
+        out.write(f"Profile of {self.file_path}\n")
+        for name, seconds in self.phases.items():
+            out.write(f"  {name:24s} {seconds * 1000:10.2f} ms\n")
+        out.write(f"  {'total':24s} {sum(self.phases.values()) * 1000:10.2f} ms\n")
+        for name, count in self.counts.items():
+            out.write(f"  {name:24s} {count:10d}\n")
+        if self.cse:
+            for name, count in self.cse.items():
+                if name != "rules":
+                    out.write(f"  {name:24s} {count:10d}\n")
+            out.write("  rules fired\n")
+            for rule, count in self.cse["rules"].items():
+                out.write(f"    {rule:>2s} {RULE_NAMES[int(rule)]:21s} {count:10d}\n")
+
+
+def count_nodes(root):
+    count = 0
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        count += 1
+        pending.extend(node.children)
+    return count
+
+
+def profile_program(file, file_path, mode, use_mmap, counters=True, optimize=True):
+    """Evaluate an open source file phase by phase.
+
+    Returns the result to print and the Profile. The program is always
+    compiled from source, so every phase is measured. Without counters the
+    CSE machine is the ordinary one, for timings free of counting overhead.
+    """
+    profile = Profile(file_path, mode)
+    with file:
+        if use_mmap:
+            with map_source(file) as buffer, profile.phase("tokenize"):
+                tokens = list(tokenize_iter(buffer))
+        else:
+            with profile.phase("read"):
+                source = file.read()
+            with profile.phase("tokenize"):
+                tokens = tokenize(source)
+    profile.counts["tokens"] = len(tokens)
+
+    with profile.phase("parse"):
+        ast_root = RPALParser(tokens).parse()
+    del tokens
+    profile.counts["AST nodes"] = count_nodes(ast_root)
+
+    with profile.phase("standardize"):
+        standardized_ast = standardize(ast_root)
+    profile.counts["standardized nodes"] = count_nodes(standardized_ast)
+
+    if optimize:
+        optimizer = Optimizer()
+        with profile.phase("optimize"):
+            optimizer.optimize(standardized_ast)
+        profile.counts["inlined bindings"] = optimizer.inlined
+        profile.counts["folded nodes"] = optimizer.folded
+        profile.counts["pruned branches"] = optimizer.pruned
+
+    if mode == "-vm":
+        machine = BytecodeMachine()
+    else:
+        machine = ProfilingMachine() if counters else CSEMachine()
+    with profile.phase("buildControlStructure"):
+        machine.buildControlStructure(standardized_ast, 0)
+    profile.counts["control structures"] = len(machine.controlStruc)
+    profile.counts["control items"] = sum(len(items) for items in machine.controlStruc)
+
+    # The bytecode machine compiles its program inside evaluate
+    with profile.phase("execute" if mode == "-vm" else "ApplyRules"):
+        result = machine.evaluate()
+    profile.counts["instructions executed"] = machine.steps
+
+    if mode != "-vm" and counters:
+        profile.cse = {
+            "peak control depth": machine.peakControl,
+            "peak stack depth": machine.peakStack,
+            "peak frames": machine.peakFrames,
+            "environments created": machine.envCount,
+            "largest environment": machine.largestEnvironment,
+            "rules": {str(rule): machine.rules[rule] for rule in RULE_NAMES},
+        }
+    return result, profile
+
+
+# Seconds between samples of the frame stack
+SAMPLE_INTERVAL = 0.001
+
+
+def frame_label(template):
+    """Name of the frame for one lambda of the program, e.g. 'lambda n (line 3)'."""
+    variables = template.boundedVar or "()"
+    if template.line is None:
+        return f"lambda {variables} #{template.number}"
+    return f"lambda {variables} (line {template.line})"
+
+
+class SamplingMachine(CSEMachine):
+    """CSEMachine that attributes work to the RPAL lambdas being evaluated.
+
+    Every environment on envStack is one frame: the top level or an
+    application of a lambda. Each step is charged to the innermost frame,
+    and a wall-clock timer samples the whole frame stack every
+    SAMPLE_INTERVAL seconds. Tail calls replace their caller's frame, as
+    they do in the machine itself.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.labels = {} #Lambda number -> frame label
+        self.currentEnv.frame = "<top level>"
+        self.steps_by_frame = Counter()
+        self.samples = Counter() #Frame stacks, outermost first -> samples
+
+    def buildControlStructure(self, root_node, index):
+        super().buildControlStructure(root_node, index)
+        self.labelFrames()
+
+    def load(self, controlStruc):
+        super().load(controlStruc)
+        self.labelFrames()
+
+    def labelFrames(self):
+        for items in self.controlStruc:
+            for item in items:
+                if type(item) == Lambda:
+                    self.labels[item.number] = frame_label(item)
+
+    # The label lives on the frame's environment and goes away with it
+    def bindEnvironment(self, closure, argument):
+        child = super().bindEnvironment(closure, argument)
+        child.frame = self.labels[closure.number]
+        return child
+
+    def sample(self, signum, frame):
+        self.samples[tuple(env.frame for env in self.envStack)] += 1
+
+    # ApplyRules charging each step to the innermost frame, with the sampling
+    # timer running
+    def ApplyRules(self):
+        control = self.control
+        pop = control.pop
+        handlers = self.handlers
+        envStack = self.envStack
+        steps_by_frame = self.steps_by_frame
+
+        previous = signal.signal(signal.SIGALRM, self.sample)
+        signal.setitimer(signal.ITIMER_REAL, SAMPLE_INTERVAL, SAMPLE_INTERVAL)
+        try:
+            steps = 0
+            while control:
+                latter = pop()
+                steps += 1
+                steps_by_frame[envStack[-1].frame] += 1
+                handlers[latter.opcode](latter)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        self.steps = steps
+
+        self.formatResult()
+
+    def write_flat(self, out):
+        """Flat profile: steps and samples per frame, busiest first."""
+        self_samples = Counter()
+        total_samples = Counter()
+        for stack, count in self.samples.items():
+            self_samples[stack[-1]] += count
+            for label in set(stack):
+                total_samples[label] += count
+
+        frames = set(self.steps_by_frame) | set(total_samples)
+        ranked = sorted(frames, key=lambda label: (-self_samples[label], -self.steps_by_frame[label], label))
+        out.write(f"{'steps':>10s} {'self ms':>9s} {'total ms':>9s}  frame\n")
+        for label in ranked:
+            out.write(f"{self.steps_by_frame[label]:10d} {self_samples[label] * SAMPLE_INTERVAL * 1000:9.0f} "
+                      f"{total_samples[label] * SAMPLE_INTERVAL * 1000:9.0f}  {label}\n")
+
+    def write_collapsed(self, out):
+        """Samples as collapsed stacks ("outer;inner count"), for flamegraph tools."""
+        for stack, count in sorted(self.samples.items()):
+            out.write(f"{';'.join(stack)} {count}\n")
+
+
+def sample_program(file, file_path, use_mmap, collapsed_path, optimize=True):
+    """Evaluate an open source file on a SamplingMachine.
+
+    Writes the flat profile to stderr and the collapsed stacks to
+    collapsed_path, and returns the result to print.
+    """
+    with file:
+        if use_mmap:
+            with map_source(file) as buffer:
+                ast_root = RPALParser(tokenize_iter(buffer)).parse()
+        else:
+            ast_root = RPALParser(tokenize_iter(file)).parse()
+
+    standardized_ast = standardize(ast_root)
+    if optimize:
+        Optimizer().optimize(standardized_ast)
+    machine = SamplingMachine()
+    machine.buildControlStructure(standardized_ast, 0)
+    result = machine.evaluate()
+
+    sys.stderr.write(f"Sampled profile of {file_path} (one sample every {SAMPLE_INTERVAL * 1000:g} ms)\n")
+    machine.write_flat(sys.stderr)
+    with open(collapsed_path, "w") as out:
+        machine.write_collapsed(out)
+    sys.stderr.write(f"Collapsed stacks written to {collapsed_path}\n")
+    return result
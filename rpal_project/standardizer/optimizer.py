@@ -0,0 +1,217 @@
+from collections import Counter
+
+from ast.ast import NodeKind, NAMES
+from cse.csemachine import binaryOperators, unaryOperators, builtInFunctions
+
+# Folding calls the CSE machine's own operator functions, so a folded value is
+# exactly what Rules 6 and 7 would compute at run time.
+BINARY_KINDS = {
+    NodeKind.PLUS, NodeKind.MINUS, NodeKind.MULTIPLY, NodeKind.DIVIDE, NodeKind.POWER,
+    NodeKind.GR, NodeKind.GE, NodeKind.LS, NodeKind.LE, NodeKind.EQ, NodeKind.NE,
+    NodeKind.OR, NodeKind.AMP,
+}
+UNARY_KINDS = {NodeKind.NEG, NodeKind.NOT}
+ARITHMETIC_KINDS = {NodeKind.PLUS, NodeKind.MINUS, NodeKind.MULTIPLY, NodeKind.DIVIDE, NodeKind.POWER}
+
+# Largest power, in bits, computed while compiling; larger ones stay for run time
+MAX_POWER_BITS = 1 << 16
+
+# Literals a let may bind to be substituted for its name. Copies of a nil
+# cannot interfere: aug never appends in place to an empty tuple.
+INLINE_KINDS = {NodeKind.INT, NodeKind.STR, NodeKind.TRUE, NodeKind.FALSE, NodeKind.DUMMY, NodeKind.NIL}
+
+# Work items of Optimizer.inline besides visiting a node
+VISIT, RESTORE, UNBIND = range(3)
+
+
+def literal_value(node):
+    """Run-time value of a literal node, or None if node is not one."""
+    match node.kind:
+        case NodeKind.INT:
+            return int(node.value)
+        case NodeKind.STR:
+            return node.value
+        case NodeKind.TRUE:
+            return True
+        case NodeKind.FALSE:
+            return False
+    return None
+
+
+def bound_names(lambda_node):
+    """Names a lambda binds: one, several for a tuple, or none for ()."""
+    binder = lambda_node.children[0]
+    if binder.kind == NodeKind.ID:
+        return (binder.value,)
+    if binder.kind == NodeKind.COMMA:
+        return tuple(child.value for child in binder.children)
+    return ()
+
+
+class Optimizer:
+    """Inlines trivial let bindings, folds constant operator nodes and prunes
+    conditionals whose condition is a literal truth value, in a standardized
+    tree.
+
+    Anything whose evaluation could fail, such as a division by zero or an
+    operator applied to the wrong type, is left for the CSE machine, so the
+    program fails at run time exactly as before, and only if it gets there.
+    """
+
+    def __init__(self):
+        self.inlined = 0
+        self.folded = 0
+        self.pruned = 0
+
+    def optimize(self, node):
+        """Optimize the tree rooted at node in place."""
+        self.inline(node)
+        return self.fold_tree(node)
+
+    def inline(self, root):
+        """Replace gamma(lambda x. P, E), the standard form of 'let x = E in P',
+        by P with E substituted for x, when E is a literal or an identifier.
+
+        Such a let would otherwise cost a closure, an environment and its
+        marker at run time. An identifier is substituted only if it is bound
+        by an enclosing lambda and by no other lambda in the program, so it
+        cannot be captured and its lookup could not have failed; built-in
+        names always qualify. The walk is top-down, carrying the substitutions
+        in scope, so a chain of lets is inlined in one pass.
+        """
+        binders = Counter()
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            if node.kind == NodeKind.LAMBDA:
+                binders.update(bound_names(node))
+            pending.extend(child for child in node.children if child.children)
+
+        substitutions = {}
+        bound = Counter()
+        pending = [(VISIT, root)]
+        while pending:
+            action, node = pending.pop()
+            if action == RESTORE:
+                for name, saved in node:
+                    if saved is None:
+                        del substitutions[name]
+                    else:
+                        substitutions[name] = saved
+                continue
+            if action == UNBIND:
+                bound.subtract(node)
+                continue
+
+            kind = node.kind
+            if kind == NodeKind.ID:
+                replacement = substitutions.get(node.value)
+                if replacement is not None:
+                    node.kind, node.value = replacement
+                continue
+
+            if kind == NodeKind.GAMMA and node.children[0].kind == NodeKind.LAMBDA:
+                lambda_node, argument = node.children
+                binder = lambda_node.children[0]
+                if binder.kind == NodeKind.ID:
+                    value = None
+                    if argument.kind in INLINE_KINDS:
+                        value = (argument.kind, argument.value)
+                    elif argument.kind == NodeKind.ID:
+                        name = argument.value
+                        value = substitutions.get(name)
+                        if value is None and (name in builtInFunctions or (bound[name] and binders[name] == 1)):
+                            value = (NodeKind.ID, name)
+                    if value is not None:
+                        # The let becomes its body, visited with x replaced
+                        body = lambda_node.children[1]
+                        node.kind, node.value, node.children, node.line = body.kind, body.value, body.children, body.line
+                        x = binder.value
+                        pending.append((RESTORE, [(x, substitutions.get(x))]))
+                        substitutions[x] = value
+                        pending.append((VISIT, node))
+                        self.inlined += 1
+                        continue
+
+            if kind == NodeKind.LAMBDA:
+                # Names the lambda binds hide any substitution for them
+                names = bound_names(node)
+                shadowed = [(name, substitutions.pop(name)) for name in names if name in substitutions]
+                bound.update(names)
+                pending.append((UNBIND, names))
+                pending.append((RESTORE, shadowed))
+                for child in reversed(node.children[1:]):
+                    pending.append((VISIT, child))
+                continue
+
+            for child in reversed(node.children):
+                pending.append((VISIT, child))
+
+    def fold_tree(self, node):
+        """Fold the tree rooted at node bottom-up, in place, with an explicit stack."""
+        pending = [(node, False)]
+        while pending:
+            current, children_done = pending.pop()
+            if children_done:
+                self.transform(current)
+            else:
+                pending.append((current, True))
+                for child in reversed(current.children):
+                    if child.children:
+                        pending.append((child, False))
+        return node
+
+    def transform(self, node):
+        """Replace node by a literal or by one of its arms, if its children allow."""
+        kind = node.kind
+        if kind in BINARY_KINDS:
+            left, right = node.children
+            a, b = literal_value(left), literal_value(right)
+            if a is None or b is None:
+                return
+            if kind in ARITHMETIC_KINDS:
+                # Repeating a string or raising to a huge power could take
+                # far longer while compiling than the program would run
+                if type(a) is not int or type(b) is not int:
+                    return
+                if kind == NodeKind.POWER and not 0 <= b * max(abs(a).bit_length(), 1) <= MAX_POWER_BITS:
+                    return
+            self.fold(node, binaryOperators[NAMES[kind]], a, b)
+
+        elif kind in UNARY_KINDS:
+            a = literal_value(node.children[0])
+            if a is not None:
+                self.fold(node, unaryOperators[NAMES[kind]], a)
+
+        elif kind == NodeKind.COND:
+            # Rule 8 runs an arm only for the values true and false
+            condition = node.children[0].kind
+            if condition == NodeKind.TRUE or condition == NodeKind.FALSE:
+                arm = node.children[1 if condition == NodeKind.TRUE else 2]
+                node.kind, node.value, node.children = arm.kind, arm.value, arm.children
+                node.line = arm.line
+                self.pruned += 1
+
+    def fold(self, node, function, *operands):
+        try:
+            value = function(*operands)
+            if type(value) is bool:
+                node.kind, node.value = (NodeKind.TRUE if value else NodeKind.FALSE), None
+            elif type(value) is int:
+                # str() refuses ints beyond the interpreter's digit limit
+                node.kind, node.value = NodeKind.INT, str(value)
+            elif type(value) is str:
+                node.kind, node.value = NodeKind.STR, value
+            else:
+                return
+        except Exception:
+            return
+        node.children = []
+        self.folded += 1
+
+
+def optimize(standardized_root):
+    """Inline trivial lets, fold constants and prune dead branches in a
+    standardized tree."""
+    Optimizer().optimize(standardized_root)
+    return standardized_root
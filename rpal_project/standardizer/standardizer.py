@@ -1,86 +1,100 @@
-from ast.ast import ASTNode
+from ast.ast import ASTNode, NodeKind
 
 class Standardizer:
     def standardize(self, node):
-        for i, child in enumerate(node.children):
-            self.standardize(child)
+        """Standardize the tree rooted at node bottom-up, using an explicit stack
+        instead of recursion so that deep trees cannot exceed the recursion limit."""
+        pending = [(node, False)]
+        while pending:
+            current, children_done = pending.pop()
+            if children_done:
+                self.transform(current)
+            else:
+                pending.append((current, True))
+                for child in reversed(current.children):
+                    # No rule applies to a leaf
+                    if child.children:
+                        pending.append((child, False))
+        return node
 
-        match node.type:
-            case 'let' if node.children[0].type == '=':
+    def transform(self, node):
+        """Apply the standardizing rule for node, whose children are already standard."""
+        match node.kind:
+            case NodeKind.LET if node.children[0].kind == NodeKind.EQUAL:
                 equal_node, p = node.children
                 x, e = equal_node.children
-                lambda_node = ASTNode('lambda', children=[x, p])
-                node.type = 'gamma'
+                lambda_node = ASTNode(NodeKind.LAMBDA, children=[x, p], line=node.line)
+                node.kind = NodeKind.GAMMA
                 node.children = [lambda_node, e]
 
-            case 'where' if node.children[1].type == '=':
+            case NodeKind.WHERE if node.children[1].kind == NodeKind.EQUAL:
                 p, equal_node = node.children
                 x, e = equal_node.children
-                lambda_node = ASTNode('lambda', children=[x, p])
-                node.type = 'gamma'
+                lambda_node = ASTNode(NodeKind.LAMBDA, children=[x, p], line=node.line)
+                node.kind = NodeKind.GAMMA
                 node.children = [lambda_node, e]
 
-            case 'fcn_form':
+            case NodeKind.FCN_FORM:
                 f = node.children[0]
                 params = node.children[1:-1]
                 e = node.children[-1]
                 for p in reversed(params):
-                    e = ASTNode('lambda', children=[p, e])
-                node.type = '='
+                    e = ASTNode(NodeKind.LAMBDA, children=[p, e], line=node.line)
+                node.kind = NodeKind.EQUAL
                 node.children = [f, e]
 
-            case 'gamma' if len(node.children) > 2:
+            case NodeKind.GAMMA if len(node.children) > 2:
                 expr = node.children.pop()
                 current = node
                 for _ in range(len(node.children) - 1):
                     arg = node.children.pop(1)
-                    lambda_node = ASTNode('lambda', children=[arg])
+                    lambda_node = ASTNode(NodeKind.LAMBDA, children=[arg], line=node.line)
                     current.children.append(lambda_node)
                     current = lambda_node
                 current.children.append(expr)
 
-            case 'within' if node.children[0].type == node.children[1].type == '=':
+            case NodeKind.WITHIN if node.children[0].kind == node.children[1].kind == NodeKind.EQUAL:
                 eq1, eq2 = node.children
                 x1, e1 = eq1.children
                 x2, e2 = eq2.children
-                lambda_node = ASTNode('lambda', children=[x1, e2])
-                gamma_node = ASTNode('gamma', children=[lambda_node, e1])
-                node.type = '='
+                lambda_node = ASTNode(NodeKind.LAMBDA, children=[x1, e2], line=node.line)
+                gamma_node = ASTNode(NodeKind.GAMMA, children=[lambda_node, e1])
+                node.kind = NodeKind.EQUAL
                 node.children = [x2, gamma_node]
 
-            case '@':
+            case NodeKind.AT:
                 e1 = node.children.pop(0)
                 n = node.children[0]
-                gamma1 = ASTNode('gamma', children=[n, e1])
+                gamma1 = ASTNode(NodeKind.GAMMA, children=[n, e1])
                 node.children[0] = gamma1
-                node.type = 'gamma'
+                node.kind = NodeKind.GAMMA
 
-            case 'and':
+            case NodeKind.AND:
                 vars = []
                 exprs = []
                 for eq in node.children:
                     x, e = eq.children
                     vars.append(x)
                     exprs.append(e)
-                comma_node = ASTNode(',', children=vars)
-                tau_node = ASTNode('tau', children=exprs)
-                node.type = '='
+                comma_node = ASTNode(NodeKind.COMMA, children=vars)
+                tau_node = ASTNode(NodeKind.TAU, children=exprs)
+                node.kind = NodeKind.EQUAL
                 node.children = [comma_node, tau_node]
 
-            case 'rec':
+            case NodeKind.REC:
                 eq = node.children[0]
                 x, e = eq.children
-                lambda_node = ASTNode('lambda', children=[x, e])
-                ystar_node = ASTNode('<Y*>')
-                gamma_node = ASTNode('gamma', children=[ystar_node, lambda_node])
-                node.type = '='
+                lambda_node = ASTNode(NodeKind.LAMBDA, children=[x, e], line=node.line)
+                ystar_node = ASTNode(NodeKind.YSTAR)
+                gamma_node = ASTNode(NodeKind.GAMMA, children=[ystar_node, lambda_node])
+                node.kind = NodeKind.EQUAL
                 node.children = [x, gamma_node]
 
-            case 'lambda' if len(node.children) > 2:
+            case NodeKind.LAMBDA if len(node.children) > 2:
                 params = node.children[:-1]
                 e = node.children[-1]
                 for p in reversed(params[1:]):
-                    e = ASTNode('lambda', children=[p, e])
+                    e = ASTNode(NodeKind.LAMBDA, children=[p, e], line=node.line)
                 node.children = [params[0], e]
 
         return node
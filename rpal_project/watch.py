@@ -0,0 +1,295 @@
+"""Re-evaluate an RPAL program whenever its source file changes.
+
+Used by myrpal.py --watch FILE. A program is a chain of top-level
+definitions, 'let D in let D in ... E', and WatchedProgram keeps each
+definition's span of the source, its standardized binding and its control
+structures between edits. An edit re-lexes and re-parses only the source
+between the last definition before it and the first one after it, so the
+work done per edit follows the size of the edit rather than of the program.
+A 'where' belongs to the final expression, which is re-parsed as a whole
+when it changes.
+
+Control structures are numbered in the order they were built rather than
+in tree order, so a closure printed as a result may show a different
+number than a fresh run would. Line numbers of definitions after an edit
+are not renumbered either; they only label lambdas for the profilers.
+"""
+import os
+import re
+import sys
+import time
+
+from lexer.lexical_analyzer import TokenType, Token, LexicalError, tokenize_iter
+from parser.parser import RPALParser
+from standardizer.standardizer import Standardizer
+from standardizer.optimizer import Optimizer
+from cse.csemachine import CSEMachine, RPALRuntimeError
+from cse.data_structures import Lambda, Gamma
+from ast.ast import NodeKind
+
+# Characters compared at a time when looking for the edited span
+CHUNK = 4096
+
+
+def common_prefix(old, new):
+    """Length of the longest common prefix of two strings."""
+    limit = min(len(old), len(new))
+    i = 0
+    while i + CHUNK <= limit and old[i:i + CHUNK] == new[i:i + CHUNK]:
+        i += CHUNK
+    while i < limit and old[i] == new[i]:
+        i += 1
+    return i
+
+
+def common_suffix(old, new, limit):
+    """Length of the longest common suffix of two strings, at most limit."""
+    i = 0
+    while i + CHUNK <= limit and old[len(old) - i - CHUNK:len(old) - i] == new[len(new) - i - CHUNK:len(new) - i]:
+        i += CHUNK
+    while i < limit and old[len(old) - i - 1] == new[len(new) - i - 1]:
+        i += 1
+    return i
+
+
+def renumber(tokens, first_line):
+    """Tokens of a region that starts after first_line lines of the file."""
+    for token in tokens:
+        token.line += first_line
+        yield token
+
+
+class Segment:
+    """A top-level 'let D in' of a watched program, or its final expression.
+
+    start and end delimit its source. structures are the control structures
+    it allocated: for a definition, the first holds the gamma and lambda that
+    bind it, and the second the items of its expression.
+    """
+    __slots__ = ("start", "end", "line", "binding", "structures")
+
+    def __init__(self, start, end, line, binding, structures):
+        self.start = start
+        self.end = end
+        self.line = line
+        self.binding = binding
+        self.structures = structures
+
+
+class WatchedProgram:
+    """Pipeline state for one source file, kept across edits."""
+
+    def __init__(self, optimize=True):
+        self.text = None
+        self.definitions = []
+        self.body = None
+        self.builder = CSEMachine()
+        self.standardizer = Standardizer()
+        self.optimizer = Optimizer() if optimize else None
+
+    def update(self, text):
+        """Bring the control structures up to date with text.
+
+        Returns how many definitions were re-parsed (the final expression
+        counts as one) and how many there are. Raises LexicalError or
+        SyntaxError if text is not a program.
+        """
+        if self.text is None:
+            return self.rebuild(text)
+        if text == self.text:
+            return 0, len(self.definitions) + 1
+
+        old = self.text
+        prefix = common_prefix(old, text)
+        suffix = common_suffix(old, text, min(len(old), len(text)) - prefix)
+        edit_end = len(old) - suffix
+        shift = len(text) - len(old)
+
+        # Definitions strictly before and after the edit keep their work; the
+        # characters next to them are unchanged, so they still end and start
+        # tokens there
+        definitions = self.definitions
+        before = 0
+        while before < len(definitions) and definitions[before].end < prefix:
+            before += 1
+        after = before
+        while after < len(definitions) and definitions[after].start <= edit_end:
+            after += 1
+
+        start = definitions[before - 1].end if before else 0
+        to_end = after == len(definitions)
+        end = len(text) if to_end else definitions[after].start + shift
+        try:
+            parsed = self.parse_region(text, start, end, to_end)
+        except (SyntaxError, LexicalError):
+            # Let a parse of the whole file report it
+            parsed = None
+        if parsed is None:
+            # The edit changed where definitions begin or end
+            return self.rebuild(text)
+        new_definitions, body = parsed
+
+        for definition in definitions[after:]:
+            definition.start += shift
+            definition.end += shift
+        for definition in definitions[before:after]:
+            self.release(definition)
+        if to_end:
+            self.release(self.body)
+            self.body = body
+        self.definitions = definitions[:before] + new_definitions + definitions[after:]
+        self.text = text
+        self.link(max(before - 1, 0), before + len(new_definitions) - 1)
+        return len(new_definitions) + to_end, len(self.definitions) + 1
+
+    def rebuild(self, text):
+        """Parse text from scratch, dropping everything kept so far."""
+        self.text = None
+        self.builder = CSEMachine()
+        new_definitions, self.body = self.parse_region(text, 0, len(text), True)
+        self.definitions = new_definitions
+        self.text = text
+        self.link(0, len(new_definitions) - 1)
+        return len(new_definitions) + 1, len(new_definitions) + 1
+
+    def parse_region(self, text, start, end, to_end):
+        """Parse text[start:end] as whole definitions, followed by the final
+        expression if to_end. Returns the new segments, or None if the region
+        does not end where a definition starts."""
+        region = text[start:end]
+        first_line = text.count("\n", 0, start)
+        line_starts = [0] + [match.end() for match in re.finditer("\n", region)]
+        offset = lambda token: start + line_starts[token.line - first_line - 1] + token.column - 1
+        if to_end:
+            # Read tokens as the parser asks for them, as myrpal.py does, so
+            # that errors are reported the same way
+            tokens = renumber(tokenize_iter(region), first_line)
+        else:
+            # Check that the next definition's 'let' is still a token of its own
+            tokens = list(renumber(tokenize_iter(region + "let"), first_line))
+            sentinel = tokens[-2]
+            if not (sentinel.type == TokenType.KEYWORD and sentinel.value == "let" and offset(sentinel) == end):
+                return None
+            tokens[-2:] = [Token(TokenType.EOF, 'EOF', sentinel.line, sentinel.column)]
+
+        parser = RPALParser(tokens)
+        parsed = []
+        while parser.check(TokenType.KEYWORD, 'let'):
+            let_token = parser.match(TokenType.KEYWORD, 'let')
+            d_node = parser.parse_D()
+            in_token = parser.match(TokenType.KEYWORD, 'in')
+            parsed.append((let_token, d_node, in_token))
+        if to_end:
+            body_start = offset(parser.current_token)
+            e_node = parser.parse_E()
+            parser.match(TokenType.EOF)
+        elif not parser.check(TokenType.EOF):
+            return None
+
+        # Standardize only once the whole region has parsed, as a fresh run
+        # does, so that a syntax error comes before any error of the standardizer
+        new_definitions = []
+        for let_token, d_node, in_token in parsed:
+            equal_node = self.standardizer.standardize(d_node)
+            if self.optimizer:
+                self.optimizer.optimize(equal_node)
+            if equal_node.kind != NodeKind.EQUAL:
+                return None
+            x, e = equal_node.children
+            if x.kind == NodeKind.COMMA:
+                binding = ",".join(child.value for child in x.children)
+            else:
+                binding = x.value or ""
+            structures = self.build(e, extra=1)
+            new_definitions.append(Segment(offset(let_token), offset(in_token) + 2,
+                                           let_token.line, binding, structures))
+
+        if not to_end:
+            return new_definitions, None
+        body_node = self.standardizer.standardize(e_node)
+        if self.optimizer:
+            self.optimizer.optimize(body_node)
+        structures = self.build(body_node)
+        return new_definitions, Segment(body_start, len(text), None, None, structures)
+
+    def build(self, node, extra=0):
+        """Build node into new control structures, after extra empty ones."""
+        builder = self.builder
+        first = builder.count + 1
+        for _ in range(extra):
+            builder.newControlStructure()
+        builder.buildControlStructure(node, builder.newControlStructure())
+        return range(first, builder.count + 1)
+
+    def release(self, segment):
+        """Drop the control structures of a segment that is gone."""
+        for number in segment.structures:
+            self.builder.controlStruc[number] = []
+
+    def link(self, first, last):
+        """Rebuild the binding structures of definitions first..last, each of
+        which applies a lambda over the rest of the program to its expression."""
+        controlStruc = self.builder.controlStruc
+        definitions = self.definitions
+        for i in range(first, min(last + 1, len(definitions))):
+            definition = definitions[i]
+            rest = definitions[i + 1] if i + 1 < len(definitions) else self.body
+            binder = Lambda(rest.structures[0])
+            binder.boundedVar = definition.binding
+            binder.line = definition.line
+            controlStruc[definition.structures[0]] = [Gamma(), binder] + controlStruc[definition.structures[1]]
+        # Structure 0 is where evaluation starts
+        start = definitions[0].structures[0] if definitions else self.body.structures[0]
+        controlStruc[0] = list(controlStruc[start])
+
+    def evaluate(self, mode):
+        """Evaluate the current program and return the result to print."""
+        from cse.bytecode import BytecodeMachine
+
+        machine = BytecodeMachine() if mode == "-vm" else CSEMachine()
+        machine.load(self.builder.controlStruc)
+        return machine.evaluate()
+
+
+def watch(file_path, mode, optimize=True, interval=0.2):
+    """Evaluate file_path, then again every time its modification time changes."""
+    program = WatchedProgram(optimize)
+    seen = None
+    try:
+        while True:
+            try:
+                stamp = os.stat(file_path).st_mtime_ns
+            except FileNotFoundError:
+                stamp = None
+            if stamp == seen:
+                time.sleep(interval)
+                continue
+            seen = stamp
+            if stamp is None:
+                print(f"Error: File '{file_path}' not found.", flush=True)
+                continue
+
+            with open(file_path) as file:
+                text = file.read()
+            start = time.perf_counter()
+            try:
+                reparsed, total = program.update(text)
+                result = program.evaluate(mode)
+            except LexicalError as e:
+                # Start over from the next version of the file
+                program = WatchedProgram(optimize)
+                print(f"Lexical Error: {e}", flush=True)
+                continue
+            except SyntaxError as e:
+                program = WatchedProgram(optimize)
+                print(f"Syntax Error: {e}", flush=True)
+                continue
+            except RPALRuntimeError as e:
+                print(e, flush=True)
+                continue
+            elapsed = time.perf_counter() - start
+            print(result, flush=True)
+            print(f"[watch] re-parsed {reparsed} of {total} definitions, "
+                  f"{elapsed * 1000:.1f} ms", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        return 0